@@ -1,12 +1,9 @@
 import streamlit as st
 import pandas as pd
-from geopy.geocoders import Nominatim
-from datetime import datetime
 
-from src.scraper import search_yellowpages, search_yelp, search_manta
-from src.data_loader import load_company_data
-from src.evaluation import score_leads, score_company_row
-from src.utils import load_cache, save_cache
+from src.export import COMPRESSIONS, FORMATS, exported_file, file_name
+from src.pipeline import SIZE_RANGES, geocode_leads, size_range, stream_search
+from src.tracing import clear_trace, start_trace
 
 # 1) Streamlit page configuration (must be first)
 st.set_page_config(page_title="AI-Powered Lead Scraper", layout="wide")
@@ -26,124 +23,47 @@ category_input = st.sidebar.text_input("Industry/Category (optional)", "").strip
 
 size_option = st.sidebar.radio(
     "Preferred Company Size:",
-    options=["Any", "Small (1–50)", "Medium (51–500)", "Large (501+)"]
+    options=list(SIZE_RANGES)
 )
 
+st.sidebar.header("Export")
+export_scope = st.sidebar.radio("Leads to export:", options=["Top 20", "Full ranked set"])
+export_format = st.sidebar.selectbox("Format:", options=list(FORMATS))
+export_compression = st.sidebar.selectbox(
+    "Compression:", options=COMPRESSIONS, format_func=lambda c: c or "none"
+)
+
+show_timings = st.sidebar.checkbox("Show stage timings", value=False)
+
+DISPLAY_COLUMNS = {
+    "name": "Name",
+    "industry": "Industry",
+    "location": "Location",
+    "phone": "Phone",
+    "year_founded": "Founded",
+    "size": "Size",
+    "rating": "Rating",
+    "score": "Score"
+}
+
+def display_frame(leads):
+    df = leads.to_frame()
+    return df[list(DISPLAY_COLUMNS)].rename(columns=DISPLAY_COLUMNS)
+
 if st.sidebar.button("Generate Leads"):
     # Validate required inputs
     if not keyword or not location:
         st.sidebar.error("Please enter both Keyword and Location.")
         st.stop()
 
-    # Normalize for filtering
-    kw_lower = keyword.lower()
-    loc_lower = location.lower()
-    cat_lower = category_input.lower()
-
-    # Map size_option to numeric range
-    preferred_range = None
-    if size_option == "Small (1–50)":
-        preferred_range = (1, 50)
-    elif size_option == "Medium (51–500)":
-        preferred_range = (51, 500)
-    elif size_option == "Large (501+)":
-        preferred_range = (501, float("inf"))
-
-    with st.spinner("Searching and scoring leads..."):
-        # --- Live Scraping from three sources (limit 10 each) ---
-        yp_leads = search_yellowpages(keyword, location, max_results=10)
-        yelp_leads = search_yelp(keyword, location, max_results=10)
-        manta_leads = search_manta(keyword, location, max_results=10)
-        scraped_all = yp_leads + yelp_leads + manta_leads
-
-        # If user specified a category, filter scraped leads by it
-        if cat_lower:
-            scraped_all = [
-                lead for lead in scraped_all
-                if cat_lower in lead.get("industry", "").lower()
-            ]
-
-        # --- Kaggle Dataset Filtering (behind the scenes) ---
-        df_all = load_company_data()
-        df_scan = df_all.head(500_000)  # scan first 500k rows for performance
-        # Keyword match: company name or industry
-        mask_kw = (
-            df_scan["name"].str.lower().str.contains(kw_lower, na=False)
-            | df_scan["industry"].str.lower().str.contains(kw_lower, na=False)
-        )
-        # Location match: city, state, or full country name
-        mask_loc = (
-            df_scan["city"].str.lower().str.contains(loc_lower, na=False)
-            | df_scan["state"].str.lower().str.contains(loc_lower, na=False)
-            | df_scan["country_name"].str.lower().str.contains(loc_lower, na=False)
-        )
+    preferred_range = size_range(size_option)
+    # Spans are traced for this session's run only; other sessions and LEAD_TRACE are unaffected
+    trace = start_trace() if show_timings else None
+    if trace is None:
+        clear_trace()  # the script thread may still hold the trace of an earlier run
 
-        if cat_lower:
-            mask_cat = df_scan["industry"].str.lower().str.contains(cat_lower, na=False)
-            df_filtered = df_scan[mask_kw & mask_loc & mask_cat]
-        else:
-            df_filtered = df_scan[mask_kw & mask_loc]
-
-        # Build Kaggle leads (limit to first 500 matches)
-        kaggle_leads = []
-        for _, row in df_filtered.head(500).iterrows():
-            size_str = row.get("size", "")
-            try:
-                if "-" in size_str:
-                    parts = size_str.split("-")
-                    mid = (int(parts[0]) + int(parts[1])) // 2
-                elif size_str.endswith("+"):
-                    mid = int(size_str.replace("+", ""))
-                else:
-                    mid = int(size_str)
-            except:
-                mid = 0
-
-            # Filter by preferred_range if specified
-            if preferred_range:
-                low, high = preferred_range
-                if mid < low or mid > high:
-                    continue
-
-            country_full = row.get("country_name", "")
-            loc_str = ", ".join(filter(None, [row["city"], row["state"], country_full]))
-            kaggle_leads.append({
-                "name": row["name"],
-                "industry": row["industry"],
-                "location": loc_str,
-                "phone": None,
-                "rating": None,
-                "snippet": None,
-                "year_founded": int(row["founded"]) if pd.notnull(row["founded"]) else None,
-                "size": mid,
-                "score": 0
-            })
-
-        # Combine scraped + Kaggle leads
-        all_leads = scraped_all + kaggle_leads
-        if not all_leads:
-            st.error("No leads found for the given inputs.")
-            st.stop()
-
-        # Score all leads (0–100 scale)
-        scored_leads = score_leads(all_leads, preferred_range)
-        top20 = scored_leads[:20]
-        df_top = pd.DataFrame(top20)
-
-    # --- Display top 20 leads in a DataFrame ---
+    # --- Top 20 leads, refreshed as each source finishes ---
     st.subheader("Top 20 Leads")
-    display_cols = ["name", "industry", "location", "phone", "year_founded", "size", "rating", "score"]
-    df_display = df_top[display_cols].rename(columns={
-        "name": "Name",
-        "industry": "Industry",
-        "location": "Location",
-        "phone": "Phone",
-        "year_founded": "Founded",
-        "size": "Size",
-        "rating": "Rating",
-        "score": "Score"
-    })
-
     # Add a tooltip next to the header (explains how the Score is calculated)
     st.markdown(
         "<div style='display: flex; align-items: center;'>"
@@ -153,29 +73,26 @@ if st.sidebar.button("Generate Leads"):
         "</div>",
         unsafe_allow_html=True
     )
+    status = st.empty()
+    table = st.empty()
 
-    st.dataframe(df_display, use_container_width=True)
-
+    # The full ranked set is only scored when it is exported; the top 20 come from the same run
+    full_export = export_scope == "Full ranked set"
+    ranked = top20 = []
+    with st.spinner("Searching and scoring leads..."):
+        # Kaggle candidates are ranked first, then re-ranked as each scraper returns
+        for stage, ranked in stream_search(keyword, location, category_input, preferred_range,
+                                           top_k=None if full_export else 20):
+            top20 = ranked[:20]
+            if top20:
+                status.caption(f"Updated after: {stage}")
+                table.dataframe(display_frame(top20), use_container_width=True)
+    status.empty()
+    if not top20:
+        st.error("No leads found for the given inputs.")
+        st.stop()
     # --- Map visualization of the first 10 leads ---
-    geolocator = Nominatim(user_agent="lead_scraper")
-    geo_cache = load_cache("geo_cache.json")
-    coords = []
-    for lead in top20[:10]:
-        loc_string = lead.get("location") or ""
-        if not loc_string.strip():
-            coords.append((None, None))
-            continue
-        if loc_string in geo_cache:
-            coords.append(tuple(geo_cache[loc_string]))
-        else:
-            try:
-                geo = geolocator.geocode(loc_string)
-                coord = (geo.latitude, geo.longitude) if geo else (None, None)
-            except:
-                coord = (None, None)
-            geo_cache[loc_string] = coord
-            coords.append(coord)
-    save_cache("geo_cache.json", geo_cache)
+    coords = geocode_leads(top20[:10])
 
     df_map = pd.DataFrame({
         "latitude": [c[0] for c in coords],
@@ -186,14 +103,19 @@ if st.sidebar.button("Generate Leads"):
         st.subheader("Map of Top 10 Leads")
         st.map(df_map)
 
-    # --- Export Buttons (side by side) ---
+    # --- Export (written in chunks to a temporary file; Streamlit reads the whole file to serve it) ---
     st.markdown("---")
-    c1, c2 = st.columns(2)
-    with c1:
-        csv_data = df_top.to_csv(index=False).encode("utf-8")
-        st.download_button("Download CSV", data=csv_data, file_name="top20_leads.csv", mime="text/csv")
-    with c2:
-        json_data = df_top.to_json(orient="records", force_ascii=False)
-        st.download_button("Download JSON", data=json_data, file_name="top20_leads.json", mime="application/json")
-
-    st.success(f"Displayed {len(df_top)} leads. Export them using the buttons above.")
+    export_set, stem = (ranked, "ranked_leads") if full_export else (top20, "top20_leads")
+    with exported_file(export_set, export_format, export_compression) as (out, exported):
+        st.download_button(
+            f"Download {export_format.upper()} ({exported} leads)", data=out,
+            file_name=file_name(stem, export_format, export_compression),
+            mime="application/octet-stream" if export_compression else FORMATS[export_format]
+        )
+
+    st.success(f"Displayed {len(top20)} leads. Export them using the button above.")
+
+    # --- Per-stage timings (collected only when enabled in the sidebar) ---
+    if trace is not None:
+        with st.expander("Stage timings", expanded=False):
+            st.dataframe(pd.DataFrame(trace.to_records()), use_container_width=True)
@@ -0,0 +1,245 @@
+"""
+Standalone benchmark harness for the lead pipeline.
+
+    python -m benchmarks.run --sizes 1k,100k                 # time every stage at each size
+    python -m benchmarks.run --sizes 1k --save-baseline      # record benchmarks/baseline.json
+    python -m benchmarks.run --sizes 1k --no-models          # skip transformer stages
+
+Each run works in a temporary directory (synthetic CSV, columnar file, index
+and model caches all live there), so results never depend on local data/.
+Scrapers are timed against the HTML fixtures in benchmarks/fixtures, no network.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.synthetic import make_leads, write_company_csv  # noqa: E402
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+QUERY = ("bakery", "texas", "")
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class ModelCallCounter:
+    """Reads the batched inference call counters of src.models' coalescers."""
+
+    def snapshot(self):
+        from src import models
+        return {"embed": models.encode_texts.calls, "sentiment": models.sentiment_probs.calls}
+
+class Recorder:
+    def __init__(self, counter=None):
+        self.counter = counter
+        self.results = {}
+
+    def stage(self, name, fn, items):
+        before = self.counter.snapshot() if self.counter else None
+        start = time.perf_counter()
+        value = fn()
+        seconds = time.perf_counter() - start
+        entry = {
+            "seconds": round(seconds, 6),
+            "items": items,
+            "throughput": round(items / seconds, 1) if seconds > 0 else None,
+            "peak_rss_mb": round(peak_rss_mb(), 1)
+        }
+        if before is not None:
+            after = self.counter.snapshot()
+            entry["model_calls"] = {k: after[k] - before[k] for k in after}
+        self.results[name] = entry
+        print(f"  {name:<28} {seconds * 1000:>10.1f} ms  {items:>10} items  "
+              f"{entry['peak_rss_mb']:>8.1f} MB" + (f"  calls={entry['model_calls']}" if before else ""))
+        return value
+
+def bench_dataset(rec, rows):
+    from src import data_loader, search_index
+
+    # Drop artifacts left by the previous dataset size
+    for path in (data_loader.COLUMNAR_PATH, os.path.join(search_index.INDEX_DIR, "meta.json")):
+        if os.path.exists(path):
+            os.remove(path)
+    write_company_csv(data_loader.CSV_PATH, rows)
+    data_loader.USE_ROWS = rows
+    data_loader._cached_df = data_loader._cached_table = None
+    search_index._cached_index = None
+    kw, loc, cat = QUERY
+
+    rec.stage("load_company_data[csv]", data_loader.load_company_data, rows)
+    data_loader._cached_df = None
+    rec.stage("load_company_data[snapshot]", data_loader.load_company_data, rows)
+    rec.stage("filter[pandas]", lambda: data_loader.filter_companies(kw, loc, cat, limit=500), rows)
+    rec.stage("convert_to_columnar", data_loader.convert_to_columnar, rows)
+    data_loader._cached_df = None
+    rec.stage("load_company_table[arrow]", data_loader.load_company_table, rows)
+    rec.stage("filter[arrow]", lambda: data_loader.filter_companies(kw, loc, cat, limit=500), rows)
+    rec.stage("build_index", search_index.build_index, rows)
+    rec.stage("filter[index]", lambda: data_loader.filter_companies(kw, loc, cat, limit=500), rows)
+
+def bench_scoring(rec, n_leads, seed=0):
+    """Scoring stages over `n_leads` synthetic leads; `seed` keeps each size's leads out of the others' caches."""
+    from src import evaluation, llm
+
+    leads = make_leads(n_leads, seed=seed)
+    rec.stage("sentiment_scores[cold]", lambda: llm.sentiment_scores([llm.sentiment_text(l) for l in leads]), n_leads)
+    rec.stage("sentiment_scores[warm]", lambda: llm.sentiment_scores([llm.sentiment_text(l) for l in leads]), n_leads)
+    # Fresh leads so semantic embeddings miss the cache
+    leads = make_leads(n_leads, seed=seed + 1)
+    rec.stage("compute_semantic_scores", lambda: evaluation.compute_semantic_scores(leads), n_leads)
+    leads = make_leads(n_leads, seed=seed + 2)
+    rec.stage("score_leads[cold]", lambda: evaluation.score_leads(leads, (1, 50)), n_leads)
+    rec.stage("score_leads[warm]", lambda: evaluation.score_leads(leads, (1, 50)), n_leads)
+    # Lead store: a cold pass stores components, a warm pass takes every score from
+    # the store, and a weight change only recomputes the stored totals
+    from src import lead_store, pipeline
+
+    def stored_pass():
+        batch = pipeline.unscored(make_leads(n_leads, seed=seed + 3))
+        pipeline.score_stored(batch, (1, 50))
+
+    lead_store._store = lead_store.LeadStore()
+    rec.stage("score_stored[cold]", stored_pass, n_leads)
+    rec.stage("score_stored[warm]", stored_pass, n_leads)
+    weights = {**evaluation.WEIGHTS, "age": evaluation.WEIGHTS["age"] + 1, "semantic": evaluation.WEIGHTS["semantic"] - 1}
+    rec.stage("lead_store.reweight", lambda: lead_store.LeadStore(weights=weights), n_leads)
+
+    from src import export
+    ranked = evaluation.score_leads(leads, (1, 50))
+    for fmt, compression in (("csv", None), ("csv", "gzip"), ("jsonl", None), ("parquet", "zstd")):
+        name = export.file_name("export", fmt, compression)
+        rec.stage(f"export[{name}]", lambda: export.export_leads(ranked, name, fmt, compression), n_leads)
+
+def bench_scrapers(rec, repeats=20):
+    from src import parsers, scraper
+
+    pages = {}
+    for source in ("yellowpages", "yelp", "manta"):
+        with open(os.path.join(FIXTURES_DIR, f"{source}.html"), "r", encoding="utf-8") as f:
+            pages[source] = f.read()
+
+    class FixtureResponse:
+        status_code = 200
+        headers = {}
+
+        def __init__(self, text):
+            self.text = text
+
+    def fixture_request(url, params=None, deadline=None, headers=None):
+        # One result page per source; later pages come back empty
+        first_page = params.get("page", 1) == 1 if params else url.endswith(("start=0", "pg=1"))
+        if not first_page:
+            return FixtureResponse("<html></html>")
+        source = "yellowpages" if "yellowpages" in url else "yelp" if "yelp" in url else "manta"
+        return FixtureResponse(pages[source])
+
+    original = scraper.attempt_request, scraper.CACHE_ENABLED
+    parser = parsers.PARSER
+    scraper.attempt_request = fixture_request
+    try:
+        scraper.CACHE_ENABLED = False  # time the parsers, not the page cache
+        for backend in parsers.BACKENDS:
+            try:
+                parsers.get_backend(backend)
+            except ImportError:
+                continue
+            parsers.PARSER = backend
+            for source, fn in scraper.SOURCES.items():
+                rec.stage(f"parse[{source}:{backend}]",
+                          lambda: [fn("bakery", "Austin, TX", 10) for _ in range(repeats)], repeats)
+        parsers.PARSER = parser
+        rec.stage("search_all[fixtures]", lambda: scraper.search_all("bakery", "Austin, TX"), 1)
+        scraper.CACHE_ENABLED = True
+        rec.stage("search_all[http-cache cold]", lambda: scraper.search_all("bakery", "Austin, TX"), 1)
+        rec.stage("search_all[http-cache warm]", lambda: scraper.search_all("bakery", "Austin, TX"), 1)
+    finally:
+        scraper.attempt_request, scraper.CACHE_ENABLED = original
+        parsers.PARSER = parser
+
+def compare(results, baseline, tolerance):
+    """Print per-stage ratios against the baseline; return the regressed stage names."""
+    regressions = []
+    for size, stages in results.items():
+        for name, entry in stages.items():
+            base = baseline.get(size, {}).get(name)
+            if not base or not base.get("seconds"):
+                continue
+            ratio = entry["seconds"] / base["seconds"]
+            flag = "REGRESSION" if ratio > 1 + tolerance else ""
+            print(f"  {size:>6} {name:<28} {ratio:>6.2f}x {flag}")
+            if flag:
+                regressions.append(f"{size}:{name}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lead pipeline stages")
+    parser.add_argument("--sizes", default="1k,100k",
+                        help="Dataset sizes and scored lead-list sizes, e.g. 1k,100k,1m,17m")
+    parser.add_argument("--no-models", action="store_true", help="Skip transformer-backed stages")
+    parser.add_argument("--out", default=None, help="Write results JSON here")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        cwd = os.getcwd()
+        os.chdir(workdir)  # all src paths are relative to data/
+        try:
+            for size in args.sizes.split(","):
+                rows = parse_size(size)
+                print(f"dataset {size} ({rows} rows)")
+                rec = Recorder()
+                bench_dataset(rec, rows)
+                results[size] = rec.results
+            print("scrapers (fixtures)")
+            rec = Recorder()
+            bench_scrapers(rec)
+            results["scrapers"] = rec.results
+            if not args.no_models:
+                for i, size in enumerate(args.sizes.split(",")):
+                    n_leads = parse_size(size)
+                    print(f"scoring {size} ({n_leads} leads)")
+                    rec = Recorder(ModelCallCounter())
+                    bench_scoring(rec, n_leads, seed=4 * i)
+                    results[f"scoring[{size}]"] = rec.results
+        finally:
+            os.chdir(cwd)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        print("vs baseline")
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import csv
+import random
+
+# Shapes taken from the BigPicture dataset: lowercase industries, LinkedIn-style size buckets
+INDUSTRIES = [
+    "information technology and services", "construction", "retail", "food & beverages",
+    "restaurants", "real estate", "marketing and advertising", "accounting",
+    "hospital & health care", "automotive", "legal services", "financial services",
+    "consumer services", "wholesale", "bakery", "education management"
+]
+SIZES = ["1-10", "11-50", "51-200", "201-500", "501-1000", "1001-5000", "5001-10000", "10001+"]
+LOCATIONS = [
+    ("austin", "texas", "us"), ("dallas", "texas", "us"), ("denver", "colorado", "us"),
+    ("seattle", "washington", "us"), ("chicago", "illinois", "us"), ("boston", "massachusetts", "us"),
+    ("london", "england", "gb"), ("manchester", "england", "gb"), ("toronto", "ontario", "ca"),
+    ("paris", "ile-de-france", "fr"), ("berlin", "berlin", "de"), ("sydney", "new south wales", "au")
+]
+NAME_WORDS = [
+    "sunrise", "golden", "summit", "blue", "oak", "river", "capitol", "pioneer", "lone star",
+    "north", "eagle", "harbor", "maple", "granite", "cedar", "apex", "liberty", "heritage"
+]
+NAME_SUFFIXES = ["bakery", "solutions", "group", "partners", "builders", "labs", "co", "services", "llc", "inc"]
+SNIPPETS = [
+    "Great service and friendly staff, highly recommend.",
+    "Prices are fair and the quality is consistent.",
+    "Slow to respond and the work was sloppy.",
+    "Family owned for decades, always reliable.",
+    "Decent experience overall, nothing special.",
+    None
+]
+CSV_COLUMNS = ["name", "domain", "year_founded", "industry", "size", "founded",
+               "city", "state", "country_code", "linkedin_url"]
+
+def company_row(rng, i):
+    city, state, code = rng.choice(LOCATIONS)
+    name = f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} {rng.choice(NAME_SUFFIXES)} {i}"
+    founded = rng.randint(1900, 2023) if rng.random() > 0.2 else ""
+    return {
+        "name": name,
+        "domain": name.replace(" ", "") + ".example.com",
+        "year_founded": founded,
+        "industry": rng.choice(INDUSTRIES) if rng.random() > 0.05 else "",
+        "size": rng.choice(SIZES) if rng.random() > 0.05 else "",
+        "founded": founded,
+        "city": city if rng.random() > 0.1 else "",
+        "state": state,
+        "country_code": code.upper(),
+        "linkedin_url": ""
+    }
+
+def write_company_csv(path, rows, seed=0):
+    """
+    Stream `rows` synthetic companies in the Kaggle CSV layout to `path`
+    (constant memory, so 17M-row files are fine).
+    """
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for i in range(rows):
+            writer.writerow(company_row(rng, i))
+    return path
+
+def make_leads(n, seed=0):
+    """
+    `n` synthetic lead dicts mixing scraped-style (rating/snippet) and Kaggle-style (founded/size) leads.
+    """
+    rng = random.Random(seed)
+    leads = []
+    for i in range(n):
+        city, state, _ = rng.choice(LOCATIONS)
+        scraped = rng.random() < 0.3
+        leads.append({
+            "name": f"{rng.choice(NAME_WORDS).title()} {rng.choice(NAME_SUFFIXES).title()} {i}",
+            "industry": rng.choice(INDUSTRIES),
+            "location": f"{city.title()}, {state.title()}",
+            "phone": f"(512) 555-{i % 10000:04d}" if scraped else None,
+            "rating": round(rng.uniform(1, 5), 1) if scraped else None,
+            "snippet": rng.choice(SNIPPETS) if scraped else None,
+            "website_url": None,
+            "year_founded": None if scraped else rng.randint(1950, 2023),
+            "size": None if scraped else rng.choice([5, 30, 125, 350, 750, 3000, 7500, 10001]),
+            "score": 0
+        })
+    return leads
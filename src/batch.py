@@ -0,0 +1,162 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.data_loader import load_company_data, load_company_table
+from src.models import get_model
+from src.pipeline import run_search, size_range, stored_ranking
+from src.tracing import prometheus_text, set_enabled
+
+QUERY_FIELDS = ["keyword", "location", "category", "size"]
+
+def read_queries(path):
+    """
+    Queries from a CSV (header: keyword,location[,category][,size]) or JSONL file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    queries = []
+    for row in rows:
+        query = {field: (row.get(field) or "").strip() for field in QUERY_FIELDS}
+        if query["keyword"] and query["location"]:
+            queries.append(query)
+    return queries
+
+def query_id(query):
+    """Stable id of a query, used as its checkpoint key."""
+    key = "\0".join(query[field].lower() for field in QUERY_FIELDS)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+def result_rows(query, leads):
+    rows = []
+    for rank, lead in enumerate(leads, start=1):
+        row = {"query_id": query_id(query), "rank": rank}
+        row.update({f"query_{field}": query[field] for field in QUERY_FIELDS})
+        row.update(lead.to_dict())
+        rows.append(row)
+    return rows
+
+class ResultSink:
+    """
+    Streams results as queries finish and records them in a checkpoint file.
+
+    JSONL output is appended to a single file; Parquet output is a directory
+    with one part file per query (readable with pd.read_parquet(directory)).
+    The checkpoint lists finished query ids, one per line, written after the
+    results are flushed, so an interrupted run can resume where it stopped.
+    """
+
+    def __init__(self, out_path, fmt):
+        self.out_path = out_path
+        self.fmt = fmt
+        self.checkpoint_path = out_path.rstrip("/") + ".checkpoint"
+        self._lock = threading.Lock()
+        if fmt == "parquet":
+            os.makedirs(out_path, exist_ok=True)
+            self._out = None
+        else:
+            self._out = open(out_path, "a", encoding="utf-8")
+        self._checkpoint = open(self.checkpoint_path, "a", encoding="utf-8")
+
+    def completed(self):
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                return {line.strip() for line in f if line.strip()}
+        except:
+            return set()
+
+    def write(self, qid, rows):
+        with self._lock:
+            if self.fmt == "parquet":
+                if rows:
+                    import pandas as pd
+                    pd.DataFrame(rows).to_parquet(os.path.join(self.out_path, f"{qid}.parquet"), index=False)
+            else:
+                for row in rows:
+                    self._out.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+                self._out.flush()
+            self._checkpoint.write(qid + "\n")
+            self._checkpoint.flush()
+
+    def close(self):
+        if self._out is not None:
+            self._out.close()
+        self._checkpoint.close()
+
+def warm_up():
+    """Load the dataset and both models once, before the worker pool starts."""
+    if load_company_table() is None:
+        load_company_data()
+    get_model("embedder")
+    get_model("sentiment")
+
+def run_batch(queries, out_path, fmt="jsonl", workers=4, top_k=20, log=print, from_store=False):
+    """
+    Run every query through the pipeline on a thread pool that shares one copy
+    of the models and dataset, streaming results to `out_path`.
+    Queries already in the checkpoint are skipped. With `from_store`, queries
+    with a stored ranking in the lead store are answered from it, without
+    scraping or models. Returns the number run.
+    """
+    sink = ResultSink(out_path, fmt)
+    done = sink.completed()
+    pending = [q for q in queries if query_id(q) not in done]
+    log(f"{len(queries) - len(pending)} queries already done, {len(pending)} to run")
+    if not pending:
+        sink.close()
+        return 0
+
+    warm_up()
+
+    def work(query):
+        if from_store:
+            leads = stored_ranking(query["keyword"], query["location"], query["category"],
+                                   size_range(query["size"]), top_k=top_k)
+            if leads is not None:
+                return query, result_rows(query, leads)
+        leads = run_search(query["keyword"], query["location"], query["category"],
+                           size_range(query["size"]), top_k=top_k)
+        return query, result_rows(query, leads)
+
+    finished = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(work, q) for q in pending]
+            for future in as_completed(futures):
+                try:
+                    query, rows = future.result()
+                except Exception as e:
+                    log(f"query failed: {e}")
+                    continue
+                sink.write(query_id(query), rows)
+                finished += 1
+                log(f"[{finished}/{len(pending)}] {query['keyword']} @ {query['location']}: {len(rows)} leads")
+    finally:
+        sink.close()
+    return finished
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run many lead searches without the Streamlit UI")
+    parser.add_argument("queries", help="CSV or JSONL file with keyword, location[, category, size]")
+    parser.add_argument("--out", required=True, help="JSONL file, or directory for --format parquet")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--top-k", type=int, default=20, help="Leads kept per query (0 = all)")
+    parser.add_argument("--from-store", action="store_true",
+                        help="Answer queries with a stored ranking from the lead store")
+    parser.add_argument("--metrics", default=None, help="Write Prometheus-style stage timings here")
+    args = parser.parse_args()
+    if args.metrics:
+        set_enabled(True)
+    run_batch(read_queries(args.queries), args.out, args.format, args.workers, args.top_k or None,
+              from_store=args.from_store)
+    if args.metrics:
+        with open(args.metrics, "w") as f:
+            f.write(prometheus_text())
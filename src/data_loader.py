@@ -1,11 +1,35 @@
+import argparse
+import glob
+import hashlib
+import os
+
+import numpy as np
 import pandas as pd
 import pycountry
 
+from src.lead import LeadBatch
+from src.tracing import span
+from src.utils import load_cache, save_cache
+
 # Path to the Kaggle CSV (place under data/)
 CSV_PATH = "data/companies-2023-q4-sm.csv"
-USE_ROWS = 500_000  # Adjust for performance vs. coverage
+# Columnar copy written once by `python -m src.data_loader convert`
+COLUMNAR_PATH = "data/companies-2023-q4-sm.arrow"
+USE_ROWS = 500_000  # Adjust for performance vs. coverage (CSV fallback only)
+
+TEXT_COLUMNS = ["name", "industry", "city", "state", "country_code", "size"]
+# Low-cardinality fields stored dictionary-encoded in the columnar file
+CATEGORICAL_COLUMNS = ["size", "country_code", "country_name", "state", "industry"]
+# Fields matched by the pandas scan; the CSV frame stores a lowercased "<col>_lower" copy of each
+SEARCH_COLUMNS = ["name", "industry", "city", "state", "country_name"]
+
+# Ready-to-query copies of the CSV frame, keyed by the CSV's SHA-1 (CSV fallback only)
+SNAPSHOT_DIR = "data/cache"
+SNAPSHOT_VERSION = 2  # bump whenever the derived columns change
+SOURCE_HASHES_PATH = os.path.join(SNAPSHOT_DIR, "source_hashes.json")
 
 _cached_df = None
+_cached_table = None
 
 def get_country_name(code):
     """
@@ -19,34 +43,394 @@ def get_country_name(code):
     except:
         return ""
 
+def country_names(codes):
+    """
+    Vectorized get_country_name over a Series: each distinct code goes through pycountry once.
+    """
+    mapping = {code: get_country_name(code) for code in pd.unique(codes)}
+    return codes.map(mapping).astype("string")
+
+def _encode_with(lookup, values):
+    """
+    Dictionary-encode `values` against a growing value→index `lookup`, so every
+    batch's dictionary extends the previous one (valid Arrow dictionary deltas).
+    """
+    import pyarrow as pa
+    local = values.dictionary_encode()
+    mapping = pa.array(
+        [lookup.setdefault(v, len(lookup)) for v in local.dictionary.to_pylist()], pa.int32()
+    )
+    return pa.DictionaryArray.from_arrays(
+        mapping.take(local.indices), pa.array(list(lookup), pa.string())
+    )
+
+def convert_to_columnar(csv_path=CSV_PATH, out_path=COLUMNAR_PATH, block_size=64 << 20):
+    """
+    One-time conversion of the full CSV into an uncompressed Arrow IPC file.
+    The CSV is streamed in blocks, so memory stays bounded by `block_size`.
+    Categorical fields are dictionary-encoded; text nulls become empty strings.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pv
+
+    cols = ["name", "industry", "size", "founded", "city", "state", "country_code"]
+    out_cols = cols + ["country_name"]
+    column_types = {c: pa.string() for c in TEXT_COLUMNS}
+    column_types["founded"] = pa.int64()
+    reader = pv.open_csv(
+        csv_path,
+        read_options=pv.ReadOptions(block_size=block_size),
+        convert_options=pv.ConvertOptions(include_columns=cols, column_types=column_types)
+    )
+    schema = pa.schema([
+        (c, pa.dictionary(pa.int32(), pa.string()) if c in CATEGORICAL_COLUMNS else column_types[c])
+        for c in out_cols
+    ])
+    lookups = {c: {} for c in CATEGORICAL_COLUMNS}
+    names_by_code = {}
+    tmp_path = out_path + ".tmp"
+    # Opened up front so a CSV with no data rows still yields an (empty) table
+    with pa.ipc.new_file(tmp_path, schema, options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)) as writer:
+        for batch in reader:
+            arrays = {c: pc.fill_null(batch.column(c), "") for c in TEXT_COLUMNS}
+            arrays["founded"] = batch.column("founded")
+            # Resolve only the distinct codes in this block through pycountry
+            codes = arrays["country_code"].dictionary_encode()
+            distinct = codes.dictionary.to_pylist()
+            for code in distinct:
+                if code not in names_by_code:
+                    names_by_code[code] = get_country_name(code)
+            names = [names_by_code[code] for code in distinct]
+            arrays["country_name"] = pa.array(names, pa.string()).take(codes.indices)
+            for c in CATEGORICAL_COLUMNS:
+                arrays[c] = _encode_with(lookups[c], arrays[c])
+            writer.write_batch(pa.record_batch([arrays[c] for c in out_cols], schema=schema))
+    os.replace(tmp_path, out_path)
+    return out_path
+
+def load_company_table(path=COLUMNAR_PATH):
+    """
+    Memory-map the columnar dataset as a pyarrow Table (zero-copy, no parsing).
+    Returns None when the columnar file has not been built yet.
+    """
+    global _cached_table
+    if _cached_table is None and os.path.exists(path):
+        import pyarrow as pa
+        _cached_table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return _cached_table
+
+def _load_from_csv():
+    cols = ["name", "industry", "size", "founded", "city", "state", "country_code"]
+    df = pd.read_csv(
+        CSV_PATH,
+        usecols=cols,
+        nrows=USE_ROWS,
+        dtype={
+            "name": "string",
+            "industry": "string",
+            "size": "string",
+            "founded": "Int64",
+            "city": "string",
+            "state": "string",
+            "country_code": "string"
+        },
+        low_memory=True
+    )
+    # Ensure no NaN in text fields
+    for c in TEXT_COLUMNS:
+        df[c] = df[c].fillna("")
+
+    # Add 'country_name' by mapping country_code → full name
+    df["country_name"] = country_names(df["country_code"])
+    # Parsed employee-count midpoints and lowercased search fields, so queries don't recompute them
+    df["size_mid"] = size_midpoints(df["size"])
+    for c in SEARCH_COLUMNS:
+        df[c + "_lower"] = df[c].str.lower()
+    return df
+
+def source_hash(path):
+    """
+    SHA-1 of a file's contents. The digest is remembered in SOURCE_HASHES_PATH
+    against the file's size and mtime, so the file is only re-read after it changes.
+    """
+    stat = os.stat(path)
+    stamp = [stat.st_size, stat.st_mtime_ns]
+    hashes = load_cache(SOURCE_HASHES_PATH)
+    entry = hashes.get(os.path.abspath(path))
+    if entry and entry["stamp"] == stamp:
+        return entry["sha1"]
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    hashes[os.path.abspath(path)] = {"stamp": stamp, "sha1": digest.hexdigest()}
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    save_cache(SOURCE_HASHES_PATH, hashes)
+    return digest.hexdigest()
+
+def snapshot_path(csv_path=CSV_PATH):
+    """Snapshot file for the current CSV contents, USE_ROWS and SNAPSHOT_VERSION."""
+    key = f"{source_hash(csv_path)}-{USE_ROWS}-v{SNAPSHOT_VERSION}"
+    return os.path.join(SNAPSHOT_DIR, f"companies-{hashlib.sha1(key.encode()).hexdigest()[:16]}.feather")
+
+def _load_from_snapshot():
+    """
+    The preprocessed CSV frame from its snapshot (memory-mapped Feather), building
+    and saving the snapshot first if the CSV changed. Returns (df, source).
+    """
+    path = snapshot_path()
+    if os.path.exists(path):
+        import pyarrow.feather as feather
+        return feather.read_table(path, memory_map=True).to_pandas(), "snapshot"
+    df = _load_from_csv()
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    for stale in glob.glob(os.path.join(SNAPSHOT_DIR, "companies-*.feather")):
+        os.remove(stale)
+    tmp_path = path + ".tmp"
+    df.reset_index(drop=True).to_feather(tmp_path)
+    os.replace(tmp_path, path)
+    return df, "csv"
+
 def load_company_data():
     """
-    Load (and cache) a subset of the Kaggle company dataset.
-    Adds a 'country_name' column for user-friendly filtering.
-    Columns: name, industry, size, founded, city, state, country_code, country_name.
+    Load (and cache) the Kaggle company dataset as a pandas DataFrame.
+    With the columnar file this materializes every row in pandas (categorical
+    columns kept as Categoricals), which for the full dataset takes several GB;
+    search and the index builders read the table through load_company_table /
+    company_column / company_batches instead. Without it, loads a USE_ROWS
+    subset of the CSV, from its preprocessed snapshot when one matches the
+    CSV's hash.
+    Adds a 'country_name' column for user-friendly filtering and an integer
+    'size_mid' column (employee-range midpoint).
+    Columns: name, industry, size, founded, city, state, country_code, country_name, size_mid
+    (plus the lowercased SEARCH_COLUMNS copies for the CSV frame).
     """
     global _cached_df
     if _cached_df is None:
-        cols = ["name", "industry", "size", "founded", "city", "state", "country_code"]
-        _cached_df = pd.read_csv(
-            CSV_PATH,
-            usecols=cols,
-            nrows=USE_ROWS,
-            dtype={
-                "name": "string",
-                "industry": "string",
-                "size": "string",
-                "founded": "Int64",
-                "city": "string",
-                "state": "string",
-                "country_code": "string"
-            },
-            low_memory=True
+        with span("load_company_data") as sp:
+            table = load_company_table()
+            if table is not None:
+                import pyarrow as pa
+                _cached_df = table.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+                # Parsed employee-count midpoints, computed once for vectorized size filtering
+                _cached_df["size_mid"] = size_midpoints(_cached_df["size"])
+                source = "arrow"
+            else:
+                _cached_df, source = _load_from_snapshot()
+            sp.set(rows=len(_cached_df), source=source)
+    return _cached_df
+
+def company_column(name):
+    """
+    One dataset column: an Arrow ChunkedArray of the memory-mapped table (no
+    pandas copy), or a Series of the CSV frame when there is no columnar file.
+    """
+    table = load_company_table()
+    if table is not None:
+        return table[name]
+    return load_company_data()[name]
+
+def company_batches(columns, batch_rows):
+    """
+    The dataset's `columns` as successive DataFrames of up to `batch_rows` rows.
+    With the columnar file each batch is converted from a zero-copy slice of the
+    table, so only one batch is in pandas at a time.
+    """
+    table = load_company_table()
+    if table is not None:
+        for start in range(0, table.num_rows, batch_rows):
+            yield table.slice(start, batch_rows).select(columns).to_pandas()
+        return
+    df = load_company_data()
+    for start in range(0, len(df), batch_rows):
+        yield df.iloc[start:start + batch_rows][columns]
+
+def _arrow_contains(column, needle):
+    """
+    Case-insensitive substring mask over a (possibly dictionary-encoded) chunked column.
+    For dictionary columns only the distinct values are matched.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    chunks = []
+    for chunk in column.chunks:
+        if pa.types.is_dictionary(chunk.type):
+            hits = pc.match_substring(chunk.dictionary, needle, ignore_case=True)
+            chunks.append(pc.fill_null(hits.take(chunk.indices), False))
+        else:
+            chunks.append(pc.fill_null(pc.match_substring(chunk, needle, ignore_case=True), False))
+    return pa.chunked_array(chunks, pa.bool_())
+
+def size_midpoint(size_str):
+    """
+    Employee-count midpoint of a size range ("51-200" → 125, "10001+" → 10001); 0 if unparseable.
+    """
+    try:
+        if "-" in size_str:
+            parts = size_str.split("-")
+            return (int(parts[0]) + int(parts[1])) // 2
+        if size_str.endswith("+"):
+            return int(size_str.replace("+", ""))
+        return int(size_str)
+    except:
+        return 0
+
+def size_midpoints(sizes):
+    """
+    Vectorized size_midpoint over a Series; only the few distinct size strings are parsed.
+    """
+    values = sizes.astype(str)
+    mapping = {v: size_midpoint(v) for v in pd.unique(values)}
+    return values.map(mapping).astype("int64")
+
+def _size_mask(size_mids, size_range):
+    low, high = size_range
+    return (size_mids >= low) & (size_mids <= high)
+
+def _arrow_size_mids(column):
+    """
+    Per-row size midpoints (NumPy) for the dictionary-encoded `size` column.
+    """
+    parts = []
+    for chunk in column.chunks:
+        lookup = np.array([size_midpoint(v) for v in chunk.dictionary.to_pylist()] or [0], dtype=np.int64)
+        parts.append(lookup[chunk.indices.to_numpy(zero_copy_only=False)])
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+def arrow_mask(table, kw_lower, loc_lower, cat_lower="", size_range=None):
+    """
+    NumPy boolean mask of the filter_companies conditions over an Arrow table (or slice of one).
+    """
+    import pyarrow.compute as pc
+    mask_kw = pc.or_(_arrow_contains(table["name"], kw_lower), _arrow_contains(table["industry"], kw_lower))
+    mask_loc = pc.or_(
+        pc.or_(_arrow_contains(table["city"], loc_lower), _arrow_contains(table["state"], loc_lower)),
+        _arrow_contains(table["country_name"], loc_lower)
+    )
+    mask = pc.and_(mask_kw, mask_loc)
+    if cat_lower:
+        mask = pc.and_(mask, _arrow_contains(table["industry"], cat_lower))
+    mask = mask.to_numpy(zero_copy_only=False)
+    if size_range:
+        mask &= _size_mask(_arrow_size_mids(table["size"]), size_range)
+    return mask
+
+def dataset_rows():
+    """
+    Number of rows in the loaded dataset (columnar file if present, else the CSV subset).
+    """
+    table = load_company_table()
+    return table.num_rows if table is not None else len(load_company_data())
+
+def company_rows(rows):
+    """
+    Materialize the given dataset row ids as a DataFrame indexed by row id
+    (including the precomputed 'size_mid' column).
+    """
+    table = load_company_table()
+    if table is not None:
+        import pyarrow as pa
+        df = table.take(pa.array(rows, pa.int64())).to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+        df.index = pd.Index(rows)
+        df["size_mid"] = size_midpoints(df["size"])
+        return df
+    return load_company_data().iloc[rows]
+
+def filter_companies(kw_lower, loc_lower, cat_lower="", limit=None, size_range=None):
+    """
+    Rows whose name/industry contain the keyword and whose city/state/country_name
+    contain the location (and industry the category, if given). When `size_range`
+    (low, high) is given, rows whose size midpoint falls outside it are dropped
+    before `limit` is applied.
+    Uses the prebuilt trigram index (src.search_index) when it matches the loaded
+    dataset and some condition is selective enough, checking only the rows it
+    returns; otherwise scans the memory-mapped columnar table (in parallel
+    row-range shards for large tables, see src.shards), materializing only the
+    matching rows, or falls back to pandas masks over the first 500k rows.
+    """
+    with span("filter_companies") as sp:
+        df = _filter_companies(kw_lower, loc_lower, cat_lower, limit, size_range, sp)
+        sp.set(rows=len(df))
+    return df
+
+def _frame_mask(df, kw_lower, loc_lower, cat_lower="", size_range=None):
+    """Boolean Series of the filter_companies conditions over (a slice of) the CSV frame."""
+    def contains(col, needle):
+        return df[col + "_lower"].str.contains(needle, regex=False, na=False)
+
+    # Keyword match: company name or industry
+    mask_kw = contains("name", kw_lower) | contains("industry", kw_lower)
+    # Location match: city, state, or full country name
+    mask_loc = contains("city", loc_lower) | contains("state", loc_lower) | contains("country_name", loc_lower)
+    mask = mask_kw & mask_loc
+    if cat_lower:
+        mask &= contains("industry", cat_lower)
+    if size_range:
+        mask &= _size_mask(df["size_mid"], size_range)
+    return mask
+
+def _filter_companies(kw_lower, loc_lower, cat_lower, limit, size_range, sp):
+    from src.search_index import candidate_rows, load_index
+
+    table = load_company_table()
+    num_rows = dataset_rows()
+    index = load_index(expected_rows=num_rows)
+    rows = candidate_rows(index, kw_lower, loc_lower, cat_lower, num_rows) if index is not None else None
+    if rows is not None:
+        # The index narrows the search to rows meeting one condition; check them all on just those rows
+        sp.set(path="index", candidates=len(rows))
+        if table is not None:
+            rows = rows[arrow_mask(table.take(rows), kw_lower, loc_lower, cat_lower, size_range)]
+        else:
+            rows = rows[_frame_mask(load_company_data().iloc[rows], kw_lower, loc_lower, cat_lower, size_range).to_numpy()]
+        if limit is not None:
+            rows = rows[:limit]
+        return company_rows(rows)
+
+    if table is not None:
+        from src.shards import filter_rows_sharded, use_shards
+        if use_shards(table.num_rows):
+            sp.set(path="shards", scanned=table.num_rows)
+            return company_rows(filter_rows_sharded(kw_lower, loc_lower, cat_lower, size_range, limit))
+        sp.set(path="arrow", scanned=table.num_rows)
+        rows = np.flatnonzero(arrow_mask(table, kw_lower, loc_lower, cat_lower, size_range))
+        if limit is not None:
+            rows = rows[:limit]
+        return company_rows(rows)
+
+    df_all = load_company_data()
+    df_scan = df_all.head(500_000)  # scan first 500k rows for performance
+    sp.set(path="pandas", scanned=len(df_scan))
+    df_filtered = df_scan[_frame_mask(df_scan, kw_lower, loc_lower, cat_lower, size_range)]
+    return df_filtered if limit is None else df_filtered.head(limit)
+
+def companies_to_leads(df):
+    """
+    LeadBatch for dataset rows, built directly from column arrays (no per-row objects).
+    """
+    locations = [
+        ", ".join(filter(None, parts))
+        for parts in zip(
+            df["city"].astype(str).tolist(),
+            df["state"].astype(str).tolist(),
+            df["country_name"].astype(str).tolist()
         )
-        # Ensure no NaN in text fields
-        for c in ["name", "industry", "city", "state", "country_code", "size"]:
-            _cached_df[c] = _cached_df[c].fillna("")
+    ]
+    return LeadBatch({
+        "name": df["name"].astype(str).tolist(),
+        "industry": df["industry"].astype(str).tolist(),
+        "location": locations,
+        "year_founded": df["founded"].to_numpy(dtype=float, na_value=np.nan),
+        "size": df["size_mid"].to_numpy(dtype=float)
+    })
 
-        # Add 'country_name' by mapping country_code → full name
-        _cached_df["country_name"] = _cached_df["country_code"].apply(get_country_name)
-    return _cached_df
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Company dataset utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="Convert the Kaggle CSV to the columnar format")
+    conv.add_argument("--csv", default=CSV_PATH)
+    conv.add_argument("--out", default=COLUMNAR_PATH)
+    args = parser.parse_args()
+    if args.command == "convert":
+        print(f"Wrote {convert_to_columnar(args.csv, args.out)}")
@@ -0,0 +1,102 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+from fuzzywuzzy import fuzz
+
+from src.lead import LeadBatch
+
+NAME_THRESHOLD = 90  # token_sort_ratio above which two names are the same business
+MAX_BLOCK_SIZE = 200  # tokens shared by more leads than this are too common to block on
+LEGAL_SUFFIXES = {"inc", "llc", "ltd", "co", "corp", "corporation", "company", "the", "and", "of"}
+MERGE_FIELDS = ["phone", "rating", "snippet", "website_url", "year_founded", "size"]
+
+def normalize_name(name):
+    """
+    Lowercase, strip punctuation and legal suffixes; returns the remaining tokens.
+    """
+    tokens = re.findall(r"[a-z0-9]+", (name or "").lower())
+    return [t for t in tokens if t not in LEGAL_SUFFIXES] or tokens
+
+def normalize_phone(phone):
+    """
+    Last 10 digits of a phone number, or "" if it has fewer than 7 digits.
+    """
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-10:] if len(digits) >= 7 else ""
+
+def location_tokens(location):
+    return {t for t in re.findall(r"[a-z]+", (location or "").lower()) if len(t) >= 3}
+
+def _same_business(a, b):
+    if a["phone"] and a["phone"] == b["phone"]:
+        return True
+    if fuzz.token_sort_ratio(a["name"], b["name"]) <= NAME_THRESHOLD:
+        return False
+    # Names match; reject only when both locations are known and share nothing
+    return not (a["loc"] and b["loc"]) or bool(a["loc"] & b["loc"])
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and value != value)  # None or NaN
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def dedup_leads(leads):
+    """
+    Collapse near-duplicate leads across all sources.
+
+    Leads are blocked on normalized name tokens and phone numbers, so only leads
+    sharing a key are compared; candidates are confirmed with the fuzzy name
+    ratio (plus location overlap) or an identical phone. The first lead of each
+    group is kept, with empty fields filled from its duplicates (which resets
+    its score to NaN).
+    `leads` may be a LeadBatch or a list of leads; returns a new LeadBatch.
+    """
+    batch = LeadBatch.from_leads(leads)
+    keys = []
+    blocks = defaultdict(list)
+    for i, (name, phone, location) in enumerate(zip(batch.name, batch.phone, batch.location)):
+        tokens = normalize_name(name)
+        info = {
+            "name": " ".join(tokens),
+            "phone": normalize_phone(phone),
+            "loc": location_tokens(location)
+        }
+        keys.append(info)
+        for token in set(tokens):
+            blocks["n:" + token].append(i)
+        if info["phone"]:
+            blocks["p:" + info["phone"]].append(i)
+
+    parent = list(range(len(batch)))
+    compared = set()
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > MAX_BLOCK_SIZE:
+            continue
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                if (i, j) in compared:
+                    continue
+                compared.add((i, j))
+                ri, rj = _find(parent, i), _find(parent, j)
+                if ri != rj and _same_business(keys[i], keys[j]):
+                    parent[max(ri, rj)] = min(ri, rj)
+
+    # Unions always keep the smaller index as root, so each root is its group's first lead
+    roots = [_find(parent, i) for i in range(len(batch))]
+    keepers = sorted(set(roots))
+    result = batch.take(keepers)
+    slot = {root: pos for pos, root in enumerate(keepers)}
+    for i, root in enumerate(roots):
+        if i == root:
+            continue
+        for field in MERGE_FIELDS:
+            kept, value = result.columns[field], batch.columns[field][i]
+            if _missing(kept[slot[root]]) and not _missing(value):
+                kept[slot[root]] = value
+                result.score[slot[root]] = np.nan  # fields changed, so any earlier score is stale
+    return result
@@ -1,15 +1,24 @@
 from datetime import datetime
-from src.llm import sentiment_score
-from sentence_transformers import SentenceTransformer
+import heapq
+import threading
+from src.lead import LeadBatch
+from src.llm import get_sentiment_cache, sentiment_score, sentiment_scores, sentiment_texts
+from src.models import BACKEND, EMBED_MODEL_NAME, encode_texts, sentiment_probs
+from src.tracing import cache_delta, span
+from src.vector_cache import VectorCache
 import numpy as np
 
 CURRENT_YEAR = datetime.now().year
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
-ideal_vec = embedder.encode(
-    ["owner-operated small business established over five years ago"],
-    convert_to_numpy=True,
-    normalize_embeddings=True
-)[0]
+EMBED_DIM = 384  # all-MiniLM-L6-v2 output size
+IDEAL_PROFILE = "owner-operated small business established over five years ago"
+
+# Embeddings are cached on disk; the SentenceTransformer loads lazily on the first miss
+_cache_lock = threading.Lock()
+_embedding_cache = None
+_ideal_vec = None
+
+# Summation order of the components (matches score_company_row, so rounding agrees)
+COMPONENTS = ["age", "size", "industry", "sentiment", "rating", "semantic"]
 
 # Weights must sum to 100
 WEIGHTS = {
@@ -41,28 +50,58 @@ def compute_size_score(size_val, preferred_range):
         return WEIGHTS["size"] * 0.5
     return 0.0
 
+def _industry_match(industry_text, keyword_lower):
+    return bool(industry_text) and keyword_lower in industry_text.lower()
+
 def compute_industry_score(industry_text, keyword_lower):
-    if industry_text and keyword_lower in industry_text.lower():
+    if _industry_match(industry_text, keyword_lower):
         return float(WEIGHTS["industry"])
     return 0.0
 
-def compute_sentiment_score(lead):
+def _sentiment_prob(lead):
     try:
-        prob_pos = sentiment_score(lead)  # 0–1 from DistilBERT SST-2
-        return prob_pos * WEIGHTS["sentiment"]
+        return sentiment_score(lead)  # 0–1 from DistilBERT SST-2
     except:
         return 0.0
 
+def compute_sentiment_score(lead):
+    return _sentiment_prob(lead) * WEIGHTS["sentiment"]
+
 def compute_rating_score(rating):
     if rating is None or rating < 0:
         return 0.0
     return min(rating / 5.0, 1.0) * WEIGHTS["rating"]
 
-def compute_semantic_score(lead):
+def semantic_text(lead):
     snippet = lead.get("snippet") or ""
-    text = f"{lead.get('name')} {lead.get('industry')} {lead.get('location')} {snippet[:200]}"
-    vec = embedder.encode([text], convert_to_numpy=True, normalize_embeddings=True)[0]
-    sim = float(np.dot(vec, ideal_vec))  # cosine similarity
+    return f"{lead.get('name')} {lead.get('industry')} {lead.get('location')} {snippet[:200]}"
+
+def get_embedding_cache():
+    """The shared on-disk embedding cache (keyed by model and backend), opened on first use."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = VectorCache("embeddings", f"{EMBED_MODEL_NAME}|{BACKEND}", dim=EMBED_DIM,
+                                               capacity=100_000)
+    return _embedding_cache
+
+def embed_texts(texts):
+    """
+    Normalized embeddings for `texts`, served from the on-disk cache where possible.
+    """
+    return get_embedding_cache().get_or_compute(texts, encode_texts)
+
+def get_ideal_vec():
+    """Embedding of the ideal target profile (computed once)."""
+    global _ideal_vec
+    if _ideal_vec is None:
+        _ideal_vec = embed_texts([IDEAL_PROFILE])[0]
+    return _ideal_vec
+
+def compute_semantic_score(lead):
+    vec = embed_texts([semantic_text(lead)])[0]
+    sim = float(np.dot(vec, get_ideal_vec()))  # cosine similarity
     normalized = max((sim - 0.6) / (1 - 0.6), 0.0)
     return normalized * WEIGHTS["semantic"]
 
@@ -83,20 +122,244 @@ def score_company_row(row, keyword_lower, preferred_range=None):
     total = age_score + size_score + industry_score + sentiment_sc + rating_score + semantic_sc
     return round(total, 2)
 
-def score_leads(leads, preferred_range=None):
-    scored = []
-    for lead in leads:
-        row = {
-            "name": lead.get("name"),
-            "industry": lead.get("industry"),
-            "location": lead.get("location"),
-            "rating": lead.get("rating"),
-            "snippet": lead.get("snippet"),
-            "year_founded": lead.get("year_founded"),
-            "founded": lead.get("year_founded"),
-            "size": lead.get("size")
-        }
-        score = score_company_row(row, lead.get("industry", ""), preferred_range)
-        lead["score"] = score
-        scored.append(lead)
-    return sorted(scored, key=lambda x: x["score"], reverse=True)
+# --- Batched (vectorized) scoring over a whole candidate set ---
+# The array functions take an optional `weight` (default: WEIGHTS[component]);
+# the component helpers use weight 1, and weighted_total applies WEIGHTS, which
+# gives bit-identical totals and lets stored components be reweighted later.
+
+def _float_array(values):
+    """Convert a list of optional numbers to a float array (None → NaN)."""
+    if isinstance(values, np.ndarray):
+        return values.astype(float, copy=False)
+    return np.array([np.nan if v is None else float(v) for v in values], dtype=float)
+
+def compute_age_scores(founded, weight=None):
+    weight = WEIGHTS["age"] if weight is None else weight
+    founded = _float_array(founded)
+    with np.errstate(invalid="ignore"):
+        valid = founded > 0  # NaN compares False
+    years = CURRENT_YEAR - founded
+    return np.where(valid, np.minimum(years / 20.0, 1.0) * weight, 0.0)
+
+def compute_size_scores(size_vals, preferred_range, weight=None):
+    weight = WEIGHTS["size"] if weight is None else weight
+    size_vals = _float_array(size_vals)
+    present = ~np.isnan(size_vals)
+    if not preferred_range:
+        return np.where(present, weight * 0.5, 0.0)
+    low, high = preferred_range
+    with np.errstate(invalid="ignore"):
+        in_range = (size_vals >= low) & (size_vals <= high)
+        near = ((size_vals < low) & ((low - size_vals) <= 0.5 * low)) | \
+               ((size_vals > high) & ((size_vals - high) <= 0.5 * high))
+    scores = np.where(near, weight * 0.5, 0.0)
+    scores = np.where(in_range, float(weight), scores)
+    return np.where(present, scores, 0.0)
+
+def compute_industry_scores(industry_texts, keywords_lower, weight=None):
+    weight = WEIGHTS["industry"] if weight is None else weight
+    return np.array([
+        float(weight) if _industry_match(text, kw) else 0.0 for text, kw in zip(industry_texts, keywords_lower)
+    ], dtype=float)
+
+def compute_rating_scores(ratings, weight=None):
+    weight = WEIGHTS["rating"] if weight is None else weight
+    ratings = _float_array(ratings)
+    with np.errstate(invalid="ignore"):
+        valid = ratings >= 0
+    return np.where(valid, np.minimum(ratings / 5.0, 1.0) * weight, 0.0)
+
+def semantic_texts(batch):
+    """semantic_text for every lead of a LeadBatch, built from its columns."""
+    return [
+        f"{name} {industry} {location} {(snippet or '')[:200]}"
+        for name, industry, location, snippet in zip(batch.name, batch.industry, batch.location, batch.snippet)
+    ]
+
+def compute_sentiment_scores(leads, weight=None):
+    weight = WEIGHTS["sentiment"] if weight is None else weight
+    batch = LeadBatch.from_leads(leads)
+    try:
+        probs = sentiment_scores(sentiment_texts(batch))
+        return np.asarray(probs, dtype=float) * weight
+    except:
+        # Fall back to per-lead inference so one bad input only zeroes itself
+        return np.array([_sentiment_prob(lead) * weight for lead in batch], dtype=float)
+
+def compute_semantic_scores(leads, weight=None):
+    weight = WEIGHTS["semantic"] if weight is None else weight
+    batch = LeadBatch.from_leads(leads)
+    if not len(batch):
+        return np.zeros(0)
+    vecs = embed_texts(semantic_texts(batch))
+    # Cosine similarity as one float32 dot per row, like compute_semantic_score:
+    # a matrix product (or einsum) sums in another order and can differ in the
+    # last bit, enough to flip a rounded score
+    ideal = get_ideal_vec()
+    sims = np.fromiter((np.dot(vec, ideal) for vec in vecs), dtype=np.float32, count=len(vecs)).astype(float)
+    normalized = np.maximum((sims - 0.6) / (1 - 0.6), 0.0)
+    return normalized * weight
+
+def compute_cheap_components(batch, keywords_lower, preferred_range=None):
+    """
+    Model-free components (age, size, industry, rating) of a LeadBatch as
+    unweighted (0–1) arrays keyed by name.
+    """
+    n = len(batch)
+    with span("score.age", rows=n):
+        age = compute_age_scores(batch.year_founded, weight=1.0)
+    with span("score.size", rows=n):
+        size = compute_size_scores(batch.size, preferred_range, weight=1.0)
+    with span("score.industry", rows=n):
+        industry = compute_industry_scores(batch.industry, keywords_lower, weight=1.0)
+    with span("score.rating", rows=n):
+        rating = compute_rating_scores(batch.rating, weight=1.0)
+    return {"age": age, "size": size, "industry": industry, "rating": rating}
+
+def compute_model_components(batch):
+    """
+    Transformer-backed components (sentiment, semantic) of a LeadBatch as
+    unweighted (0–1) arrays keyed by name.
+    """
+    n = len(batch)
+    with span("score.sentiment", rows=n) as sp:
+        cache = get_sentiment_cache()
+        cache_before, calls_before = cache.stats(), sentiment_probs.calls
+        sentiment = compute_sentiment_scores(batch, weight=1.0)
+        sp.set(model_calls=sentiment_probs.calls - calls_before, **cache_delta(cache, cache_before))
+    with span("score.semantic", rows=n) as sp:
+        cache = get_embedding_cache()
+        cache_before, calls_before = cache.stats(), encode_texts.calls
+        semantic = compute_semantic_scores(batch, weight=1.0)
+        sp.set(model_calls=encode_texts.calls - calls_before, **cache_delta(cache, cache_before))
+    return {"sentiment": sentiment, "semantic": semantic}
+
+def weighted_total(components, weights=None):
+    """Sum of unweighted component arrays times `weights` (default WEIGHTS), in COMPONENTS order."""
+    weights = weights or WEIGHTS
+    total = 0.0
+    for name in COMPONENTS:
+        total = total + weights[name] * components[name]
+    return total
+
+def round_scores(totals):
+    """Python's round() per value, as score_company_row does (np.round can differ at .xx5)."""
+    return np.array([round(float(t), 2) for t in totals], dtype=float)
+
+def empty_components(n):
+    """NaN-filled component arrays, for collecting the components of scored leads."""
+    return {name: np.full(n, np.nan) for name in COMPONENTS}
+
+def score_batch(batch, keywords_lower, preferred_range=None, components_out=None):
+    """
+    Vectorized equivalent of score_company_row over a LeadBatch.
+    Returns an array of totals rounded to 2 decimals; the unweighted components
+    are also copied into `components_out` (see empty_components) if given.
+    """
+    if not len(batch):
+        return np.zeros(0)
+    components = compute_cheap_components(batch, keywords_lower, preferred_range)
+    components.update(compute_model_components(batch))
+    if components_out is not None:
+        for name in COMPONENTS:
+            components_out[name][:] = components[name]
+    return round_scores(weighted_total(components))
+
+def score_batch_top_k(batch, keywords_lower, k, preferred_range=None, chunk_size=64, known=None,
+                      components_out=None):
+    """
+    Exact top-k over a LeadBatch without running the models on leads that cannot make it.
+
+    Cheap components are computed for every lead; adding the maximum sentiment +
+    semantic weight gives each lead an upper bound. Leads are fully scored in
+    chunks, in descending bound order, while a k-sized min-heap tracks the best
+    totals; scoring stops once the next bound is below the heap's minimum.
+    Leads flagged in the boolean array `known` keep their batch.score and seed
+    the heap without being rescored. The unweighted components of the leads that
+    were fully scored are copied into `components_out` if given.
+    Returns [(index, score)] sorted by descending score (ties keep input order).
+    """
+    if not len(batch) or k <= 0:
+        return []
+    if known is None:
+        known = np.zeros(len(batch), dtype=bool)
+    heap = []  # (score, -index): the root is the weakest of the current top k
+
+    def offer(item):
+        if len(heap) < k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    for i in np.flatnonzero(known):
+        offer((float(batch.score[i]), -int(i)))
+    stale = np.flatnonzero(~known)
+    pos = 0
+    with span("score.top_k", rows=len(batch), k=k, known=len(batch) - len(stale)) as sp:
+        if len(stale):
+            sub = batch.take(stale)
+            cheap = compute_cheap_components(sub, [keywords_lower[i] for i in stale], preferred_range)
+            bounds = weighted_total({**cheap, "sentiment": 1.0, "semantic": 1.0})
+            order = np.argsort(-bounds, kind="stable")
+            while pos < len(order):
+                if len(heap) >= k and round(float(bounds[order[pos]]), 2) < heap[0][0]:
+                    break
+                chunk = order[pos:pos + max(chunk_size, k - len(heap))]
+                pos += len(chunk)
+                components = {name: values[chunk] for name, values in cheap.items()}
+                components.update(compute_model_components(sub.take(chunk)))
+                if components_out is not None:
+                    for name in COMPONENTS:
+                        components_out[name][stale[chunk]] = components[name]
+                for j, total in zip(chunk, round_scores(weighted_total(components))):
+                    offer((float(total), -int(stale[j])))
+        sp.set(model_scored=pos)
+    return [(-neg_i, score) for score, neg_i in sorted(heap, key=lambda x: (-x[0], -x[1]))]
+
+def fill_scores(batch, preferred_range=None, top_k=None, components_out=None):
+    """
+    Compute the missing (NaN) scores of a LeadBatch in place; leads that already
+    have a score keep it. With `top_k`, only leads that can still reach the top
+    k are scored and the rest stay NaN; returns the top k as [(index, score)]
+    (None without `top_k`). The unweighted components of every lead scored here
+    are copied into `components_out` (see empty_components) if given.
+    """
+    keywords = [industry or "" for industry in batch.industry]
+    known = ~np.isnan(batch.score)
+    if top_k is not None:
+        ranked = score_batch_top_k(batch, keywords, top_k, preferred_range, known=known,
+                                   components_out=components_out)
+        for i, score in ranked:
+            batch.score[i] = score
+        return ranked
+    stale = np.flatnonzero(~known)
+    if len(stale):
+        collected = empty_components(len(stale)) if components_out is not None else None
+        batch.score[stale] = score_batch(batch.take(stale), [keywords[i] for i in stale], preferred_range, collected)
+        if components_out is not None:
+            for name in COMPONENTS:
+                components_out[name][stale] = collected[name]
+    return None
+
+def order_by_score(batch, ranked=None):
+    """
+    `batch` sorted by descending score (ties keep input order), or just the
+    leads of `ranked` ([(index, score)] from fill_scores with top_k) in that order.
+    """
+    if ranked is not None:
+        return batch.take([i for i, _ in ranked])
+    return batch.take(np.argsort(-batch.score, kind="stable"))
+
+def score_leads(leads, preferred_range=None, top_k=None, reuse_scores=False):
+    """
+    Score all leads in one batched pass (one encode call, mini-batched sentiment)
+    and return them as a LeadBatch sorted by descending score.
+    `leads` may be a LeadBatch or a list of Lead objects/dicts; it is not modified.
+    With `top_k`, only the best `top_k` leads are returned and the models run
+    only on leads whose score upper bound can still reach the top k.
+    With `reuse_scores`, leads that already carry a score keep it (see fill_scores).
+    """
+    source = LeadBatch.from_leads(leads)
+    scores = source.score.copy() if reuse_scores else np.full(len(source), np.nan)
+    batch = LeadBatch({**source.columns, "score": scores})
+    return order_by_score(batch, fill_scores(batch, preferred_range, top_k))
@@ -0,0 +1,152 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from src.lead import INT_FIELDS, LEAD_FIELDS, TEXT_FIELDS, LeadBatch
+from src.tracing import span
+
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+COMPRESSIONS = [None, "gzip", "zstd"]
+EXPORT_CHUNK = 10_000  # leads serialized at a time
+
+def file_name(stem, fmt, compression=None):
+    """Download name for an export, e.g. leads.csv.gz (Parquet compresses inside the file)."""
+    suffix = {"gzip": ".gz", "zstd": ".zst"}.get(compression, "") if fmt != "parquet" else ""
+    return f"{stem}.{fmt}{suffix}"
+
+def iter_chunks(leads, chunk_size=EXPORT_CHUNK):
+    """
+    LeadBatch chunks of at most `chunk_size` leads from a LeadBatch, a list of
+    leads, or an iterable of LeadBatches (e.g. chunks produced while scoring).
+    """
+    if not isinstance(leads, (LeadBatch, list)):
+        for part in leads:
+            yield from iter_chunks(part, chunk_size)
+        return
+    batch = LeadBatch.from_leads(leads)
+    for start in range(0, len(batch), chunk_size):
+        yield batch.take(np.arange(start, min(start + chunk_size, len(batch))))
+
+def _rows(chunk, columns):
+    """Plain Python rows of a chunk: NaN -> None, year/size as int, score rounded like Lead.score."""
+    values = []
+    for f in columns:
+        col = chunk.columns[f]
+        if f in TEXT_FIELDS:
+            values.append(col)
+        elif f == "score":
+            values.append([None if v != v else round(float(v), 2) for v in col])
+        elif f in INT_FIELDS:
+            values.append([None if v != v else int(v) for v in col])
+        else:
+            values.append([None if v != v else float(v) for v in col])
+    return zip(*values)
+
+def _open_text(out, compression):
+    """Text stream over binary file `out`, compressed on the fly if asked."""
+    if compression == "gzip":
+        raw = gzip.GzipFile(fileobj=out, mode="wb")
+    elif compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd export needs the zstandard package")
+        raw = zstandard.ZstdCompressor().stream_writer(out, closefd=False)
+    elif compression is None:
+        raw = out
+    else:
+        raise ValueError(f"unknown compression: {compression}")
+    return raw, io.TextIOWrapper(raw, encoding="utf-8", newline="", write_through=True)
+
+def _write_csv(chunks, out, compression, columns):
+    raw, text = _open_text(out, compression)
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    rows = 0
+    for chunk in chunks:
+        writer.writerows(_rows(chunk, columns))  # None is written as an empty field
+        rows += len(chunk)
+    text.detach()
+    if raw is not out:
+        raw.close()
+    return rows
+
+def _write_jsonl(chunks, out, compression, columns):
+    raw, text = _open_text(out, compression)
+    rows = 0
+    for chunk in chunks:
+        text.write("".join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in _rows(chunk, columns)
+        ))
+        rows += len(chunk)
+    text.detach()
+    if raw is not out:
+        raw.close()
+    return rows
+
+def _write_parquet(chunks, out, compression, columns):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {f: pa.string() if f in TEXT_FIELDS else pa.int64() if f in INT_FIELDS else pa.float64()
+             for f in columns}
+    schema = pa.schema([(f, types[f]) for f in columns])
+    rows = 0
+    # One row group per chunk; the codec compresses inside the file
+    with pq.ParquetWriter(out, schema, compression=compression or "snappy") as writer:
+        for chunk in chunks:
+            arrays = []
+            for f in columns:
+                col = chunk.columns[f]
+                if f in INT_FIELDS:
+                    missing = np.isnan(col)
+                    arrays.append(pa.array(np.where(missing, 0, col).astype(np.int64), mask=missing))
+                else:
+                    arrays.append(pa.array(col, type=types[f], from_pandas=True))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(chunk)
+    return rows
+
+_WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}
+
+def export_leads(leads, dest, fmt="csv", compression=None, chunk_size=EXPORT_CHUNK, columns=None):
+    """
+    Write leads to `dest` (a path or a binary file object) as CSV, JSONL or
+    Parquet, `chunk_size` leads at a time, so memory stays flat however many
+    leads are exported. `leads` is anything iter_chunks accepts; `compression`
+    is None, "gzip" or "zstd" (a Parquet codec for Parquet). Returns the number
+    of leads written.
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"unknown export format: {fmt}")
+    columns = columns or LEAD_FIELDS
+    with span("export", format=fmt, compression=compression or "none") as sp:
+        if isinstance(dest, str):
+            with open(dest, "wb") as out:
+                rows = _WRITERS[fmt](iter_chunks(leads, chunk_size), out, compression, columns)
+        else:
+            rows = _WRITERS[fmt](iter_chunks(leads, chunk_size), dest, compression, columns)
+        sp.set(rows=rows)
+    return rows
+
+@contextmanager
+def exported_file(leads, fmt="csv", compression=None, chunk_size=EXPORT_CHUNK):
+    """
+    Export leads to a temporary file and yield (file reopened for reading, rows
+    written); the file is removed on exit. The reader is a plain binary file
+    object, which st.download_button accepts.
+    """
+    fd, path = tempfile.mkstemp(suffix="." + fmt)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            rows = export_leads(leads, out, fmt, compression, chunk_size)
+        with open(path, "rb") as f:
+            yield f, rows
+    finally:
+        os.remove(path)
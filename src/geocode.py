@@ -0,0 +1,230 @@
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.tracing import span
+from src.utils import load_cache
+
+GEO_DB_PATH = "data/cache/geocode.sqlite"
+LEGACY_CACHE_PATH = "geo_cache.json"
+# Optional offline gazetteer: CSV with city,state,country,latitude,longitude
+GAZETTEER_PATH = "data/gazetteer.csv"
+NEGATIVE_TTL = 7 * 24 * 3600  # failed lookups are retried after a week
+NOMINATIM_MIN_INTERVAL = 1.0  # Nominatim usage policy: max 1 request per second
+
+US_STATES = {
+    "al": "alabama", "ak": "alaska", "az": "arizona", "ar": "arkansas", "ca": "california",
+    "co": "colorado", "ct": "connecticut", "de": "delaware", "fl": "florida", "ga": "georgia",
+    "hi": "hawaii", "id": "idaho", "il": "illinois", "in": "indiana", "ia": "iowa",
+    "ks": "kansas", "ky": "kentucky", "la": "louisiana", "me": "maine", "md": "maryland",
+    "ma": "massachusetts", "mi": "michigan", "mn": "minnesota", "ms": "mississippi",
+    "mo": "missouri", "mt": "montana", "ne": "nebraska", "nv": "nevada", "nh": "new hampshire",
+    "nj": "new jersey", "nm": "new mexico", "ny": "new york", "nc": "north carolina",
+    "nd": "north dakota", "oh": "ohio", "ok": "oklahoma", "or": "oregon", "pa": "pennsylvania",
+    "ri": "rhode island", "sc": "south carolina", "sd": "south dakota", "tn": "tennessee",
+    "tx": "texas", "ut": "utah", "vt": "vermont", "va": "virginia", "wa": "washington",
+    "wv": "west virginia", "wi": "wisconsin", "wy": "wyoming", "dc": "district of columbia"
+}
+COUNTRY_ALIASES = {"usa": "united states", "us": "united states", "uk": "united kingdom"}
+
+def _is_code(words):
+    return len(words) == 1 and len(words[0]) == 2
+
+def normalize_address(address):
+    """
+    Canonical cache key: lowercase tokens with punctuation and commas dropped,
+    so "Austin, TX" and "austin texas" match. A 2-letter US state code is
+    expanded only when it is a comma-separated part of its own ("Austin, TX",
+    but not the country code in "Toronto, ON, CA") or comes right before a ZIP
+    ("TX 78701"); a part that is a common country abbreviation is expanded too.
+    """
+    text = re.sub(r"[^\w\s,]", " ", (address or "").lower())
+    parts = [part.split() for part in text.split(",")]
+    parts = [words for words in parts if words]
+    tokens = []
+    for i, words in enumerate(parts):
+        part = " ".join(words)
+        if part in COUNTRY_ALIASES:
+            tokens.append(COUNTRY_ALIASES[part])
+        elif _is_code(words) and part in US_STATES and not (i > 0 and _is_code(parts[i - 1])):
+            tokens.append(US_STATES[part])
+        else:
+            tokens.extend(
+                US_STATES.get(w, w) if len(w) == 2 and j + 1 < len(words) and re.fullmatch(r"\d{5}", words[j + 1]) else w
+                for j, w in enumerate(words)
+            )
+    return " ".join(tokens)
+
+class GeoCache:
+    """
+    SQLite-backed geocode cache with incremental writes.
+    Misses are stored as negative entries that expire after NEGATIVE_TTL.
+    """
+
+    def __init__(self, path=GEO_DB_PATH, negative_ttl=NEGATIVE_TTL):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            " key TEXT PRIMARY KEY, lat REAL, lon REAL, found INTEGER, updated REAL)"
+        )
+        self._conn.commit()
+        self._import_legacy()
+
+    def _import_legacy(self):
+        """One-time import of the old geo_cache.json (found entries only)."""
+        if self._conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]:
+            return
+        legacy = load_cache(LEGACY_CACHE_PATH)
+        for address, coord in legacy.items():
+            if coord and coord[0] is not None:
+                self.put(address, tuple(coord))
+
+    def get(self, address):
+        """
+        (lat, lon) for a cached hit, (None, None) for a live negative entry,
+        or None when the address must be looked up.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lat, lon, found, updated FROM geocode WHERE key = ?",
+                (normalize_address(address),)
+            ).fetchone()
+        if row is None:
+            return None
+        lat, lon, found, updated = row
+        if found:
+            return (lat, lon)
+        if time.time() - updated < self.negative_ttl:
+            return (None, None)
+        return None
+
+    def put(self, address, coord):
+        lat, lon = coord if coord else (None, None)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode (key, lat, lon, found, updated) VALUES (?, ?, ?, ?, ?)",
+                (normalize_address(address), lat, lon, int(lat is not None), time.time())
+            )
+            self._conn.commit()
+
+class NominatimBackend:
+    """
+    Online lookups through geopy's Nominatim, rate-limited across threads.
+    """
+    name = "nominatim"
+
+    def __init__(self, user_agent="lead_scraper", min_interval=NOMINATIM_MIN_INTERVAL):
+        from geopy.geocoders import Nominatim
+        self._geolocator = Nominatim(user_agent=user_agent)
+        self._min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def _wait_turn(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def geocode(self, address):
+        self._wait_turn()
+        try:
+            geo = self._geolocator.geocode(address)
+        except:
+            return None  # transient error: not cached
+        return (geo.latitude, geo.longitude) if geo else (None, None)
+
+class GazetteerBackend:
+    """
+    Offline city/state/country lookups from a local gazetteer CSV; no network.
+    Rows earlier in the file win when several share a key (sort by population).
+    """
+    name = "gazetteer"
+
+    def __init__(self, path=GAZETTEER_PATH):
+        self._coords = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                coord = (float(row["latitude"]), float(row["longitude"]))
+                city, state, country = row.get("city", ""), row.get("state", ""), row.get("country", "")
+                for parts in ([city, state, country], [city, state], [city, country]):
+                    key = normalize_address(", ".join(p for p in parts if p))
+                    if key:
+                        self._coords.setdefault(key, coord)
+
+    def geocode(self, address):
+        coord = self._coords.get(normalize_address(address))
+        return coord if coord else None  # None: let the next backend try
+
+def default_backends():
+    backends = []
+    if os.path.exists(GAZETTEER_PATH):
+        backends.append(GazetteerBackend())
+    backends.append(NominatimBackend())
+    return backends
+
+class Geocoder:
+    """
+    Cache-first geocoder. Uncached addresses are resolved concurrently; each
+    backend is tried in order until one returns a result ((None, None) = not found).
+    """
+
+    def __init__(self, backends=None, cache=None, max_workers=4):
+        self.backends = backends if backends is not None else default_backends()
+        self.cache = cache or GeoCache()
+        self.max_workers = max_workers
+
+    def _lookup(self, address):
+        result = None
+        for backend in self.backends:
+            result = backend.geocode(address)
+            if result and result[0] is not None:
+                break
+        if result is not None:
+            self.cache.put(address, result)
+        return result or (None, None)
+
+    def geocode_many(self, addresses):
+        """
+        (lat, lon) per address, (None, None) for empty or unresolved ones.
+        Addresses sharing a normalized key are looked up once.
+        """
+        with span("geocode", rows=len(addresses)) as sp:
+            results = [(None, None)] * len(addresses)
+            pending = {}
+            hits = 0
+            for i, address in enumerate(addresses):
+                if not (address or "").strip():
+                    continue
+                cached = self.cache.get(address)
+                if cached is not None:
+                    results[i] = cached
+                    hits += 1
+                else:
+                    pending.setdefault(normalize_address(address), (address, []))[1].append(i)
+            if pending:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    lookups = {key: pool.submit(self._lookup, address) for key, (address, _) in pending.items()}
+                for key, future in lookups.items():
+                    for i in pending[key][1]:
+                        results[i] = future.result()
+            sp.set(cache_hits=hits, lookups=len(pending))
+        return results
+
+_default_geocoder = None
+
+def get_geocoder():
+    """Process-wide Geocoder (shared cache connection and rate limiter)."""
+    global _default_geocoder
+    if _default_geocoder is None:
+        _default_geocoder = Geocoder()
+    return _default_geocoder
@@ -0,0 +1,96 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+HTTP_DB_PATH = "data/cache/http.sqlite"
+MAX_ENTRY_AGE = 7 * 24 * 3600  # entries older than this are dropped when the cache opens
+
+def cache_key(url, params=None):
+    """
+    Normalized request URL: lowercase scheme/host, no fragment, and the query
+    string (merged with `params`) sorted, so equivalent requests share an entry.
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += [(str(k), str(v)) for k, v in params.items()]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", urlencode(sorted(query)), ""))
+
+class CachedPage:
+    __slots__ = ("body", "etag", "last_modified", "fetched", "parsed")
+
+    def __init__(self, body, etag, last_modified, fetched, parsed):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched = fetched
+        self.parsed = parsed  # JSON-compatible parse result stored with the page, or None
+
+    @property
+    def age(self):
+        return time.time() - self.fetched
+
+    def validators(self):
+        """Conditional request headers for revalidating this page."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class HttpCache:
+    """
+    SQLite-backed cache of fetched pages: the zlib-compressed body, its
+    ETag/Last-Modified validators, the fetch time and the parsed result, so a
+    hit needs neither the network nor the HTML parser.
+    """
+
+    def __init__(self, path=HTTP_DB_PATH, max_age=MAX_ENTRY_AGE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY, body BLOB, etag TEXT, last_modified TEXT, fetched REAL, parsed TEXT)"
+        )
+        self._conn.execute("DELETE FROM pages WHERE fetched < ?", (time.time() - max_age,))
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched, parsed FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, fetched, parsed = row
+        return CachedPage(
+            zlib.decompress(body).decode("utf-8"), etag, last_modified, fetched,
+            json.loads(parsed) if parsed is not None else None
+        )
+
+    def put(self, key, body, etag=None, last_modified=None, parsed=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (key, body, etag, last_modified, fetched, parsed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, zlib.compress(body.encode("utf-8")), etag, last_modified, time.time(),
+                 json.dumps(parsed) if parsed is not None else None)
+            )
+            self._conn.commit()
+
+    def touch(self, key):
+        """Mark an entry fresh again (the server answered 304 Not Modified)."""
+        with self._lock:
+            self._conn.execute("UPDATE pages SET fetched = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.commit()
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+LEAD_FIELDS = ["name", "industry", "location", "phone", "rating", "snippet",
+               "website_url", "year_founded", "size", "score"]
+TEXT_FIELDS = ["name", "industry", "location", "phone", "snippet", "website_url"]
+NUMERIC_FIELDS = ["rating", "year_founded", "size", "score"]
+INT_FIELDS = {"year_founded", "size"}
+_FIELD_SET = frozenset(LEAD_FIELDS)
+
+class Lead:
+    """
+    One lead with fixed fields. Uses __slots__ (no per-instance dict) and keeps a
+    small mapping-style API (get, [], in, copy) so existing dict-based code works.
+    """
+    __slots__ = LEAD_FIELDS
+
+    def __init__(self, name, industry="", location=None, phone=None, rating=None, snippet=None,
+                 website_url=None, year_founded=None, size=None, score=0):
+        self.name = name
+        self.industry = industry
+        self.location = location
+        self.phone = phone
+        self.rating = rating
+        self.snippet = snippet
+        self.website_url = website_url
+        self.year_founded = year_founded
+        self.size = size
+        self.score = score
+
+    def get(self, key, default=None):
+        if key not in _FIELD_SET:
+            return default
+        return getattr(self, key)
+
+    def __getitem__(self, key):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in _FIELD_SET
+
+    def copy(self):
+        return Lead(*(getattr(self, f) for f in LEAD_FIELDS))
+
+    def to_dict(self):
+        return {f: getattr(self, f) for f in LEAD_FIELDS}
+
+    def __repr__(self):
+        return f"Lead(name={self.name!r}, score={self.score!r})"
+
+def _none_if_nan(value, as_int=False):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return int(value) if as_int else float(value)
+
+class LeadBatch:
+    """
+    Columnar set of leads: text fields are lists, numeric fields are float64
+    NumPy arrays with NaN for missing values. Scoring works on these arrays
+    directly; Lead objects are only created when iterating or indexing.
+    """
+
+    def __init__(self, columns):
+        n = len(columns["name"])
+        self.columns = {}
+        for f in TEXT_FIELDS:
+            values = columns.get(f)
+            self.columns[f] = list(values) if values is not None else [None] * n
+        for f in NUMERIC_FIELDS:
+            values = columns.get(f)
+            if values is None:
+                values = np.zeros(n) if f == "score" else np.full(n, np.nan)
+            self.columns[f] = np.asarray(
+                [np.nan if v is None else v for v in values] if isinstance(values, list) else values,
+                dtype=float
+            )
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __len__(self):
+        return len(self.columns["name"])
+
+    def lead(self, i):
+        c = self.columns
+        return Lead(
+            c["name"][i], c["industry"][i], c["location"][i], c["phone"][i],
+            _none_if_nan(c["rating"][i]), c["snippet"][i], c["website_url"][i],
+            _none_if_nan(c["year_founded"][i], as_int=True), _none_if_nan(c["size"][i], as_int=True),
+            round(float(c["score"][i]), 2)
+        )
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.take(np.arange(len(self))[i])
+        return self.lead(i)
+
+    def __iter__(self):
+        return (self.lead(i) for i in range(len(self)))
+
+    def take(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        cols = {f: [self.columns[f][i] for i in indices] for f in TEXT_FIELDS}
+        cols.update({f: self.columns[f][indices] for f in NUMERIC_FIELDS})
+        return LeadBatch(cols)
+
+    def to_leads(self):
+        return list(self)
+
+    def to_frame(self):
+        """DataFrame with LEAD_FIELDS columns (nullable Int64 for year/size)."""
+        df = pd.DataFrame({f: self.columns[f] for f in LEAD_FIELDS})
+        for f in INT_FIELDS:
+            df[f] = df[f].astype("Int64")
+        return df
+
+    @classmethod
+    def from_leads(cls, leads):
+        if isinstance(leads, LeadBatch):
+            return leads
+        leads = list(leads)
+        return cls({f: [lead.get(f) for lead in leads] for f in LEAD_FIELDS})
+
+    @classmethod
+    def concat(cls, batches):
+        batches = [cls.from_leads(b) for b in batches]
+        cols = {f: [v for b in batches for v in b.columns[f]] for f in TEXT_FIELDS}
+        cols.update({f: np.concatenate([b.columns[f] for b in batches]) if batches else np.zeros(0)
+                     for f in NUMERIC_FIELDS})
+        return cls(cols)
@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from src.dedup import location_tokens, normalize_name, normalize_phone
+from src.evaluation import (
+    COMPONENTS, CURRENT_YEAR, IDEAL_PROFILE, WEIGHTS, compute_size_scores, round_scores, weighted_total
+)
+from src.lead import LEAD_FIELDS, LeadBatch
+from src.models import BACKEND, EMBED_MODEL_NAME, SENTIMENT_MODEL_NAME
+from src.tracing import span
+
+STORE_PATH = "data/leads.sqlite"
+STORE_ENABLED = os.environ.get("LEAD_STORE", "1") not in ("", "0", "false")
+# Components that depend only on the lead itself; size depends on the query's size range
+STORED_COMPONENTS = [name for name in COMPONENTS if name != "size"]
+FIELDS = [f for f in LEAD_FIELDS if f != "score"]
+SQL_CHUNK = 500  # keys per IN (...) lookup, under SQLite's variable limit
+
+_lock = threading.Lock()
+_store = None
+
+def lead_key(name, phone, location):
+    """
+    Identity of a business across runs: normalized name tokens plus the phone
+    number, or the location tokens when there is no usable phone.
+    """
+    phone = normalize_phone(phone)
+    where = phone or " ".join(sorted(location_tokens(location)))
+    return " ".join(normalize_name(name)) + "|" + where
+
+def content_hash(batch, i):
+    """Hash of every field of lead `i` that feeds a stored component."""
+    values = [batch.columns[f][i] for f in FIELDS]
+    values = [None if isinstance(v, float) and v != v else v for v in values]
+    return hashlib.sha1(json.dumps(values, default=float).encode("utf-8")).hexdigest()
+
+def model_versions():
+    """Everything besides the lead that the stored components depend on."""
+    profile = hashlib.sha1(IDEAL_PROFILE.encode("utf-8")).hexdigest()[:8]
+    return f"{SENTIMENT_MODEL_NAME}|{EMBED_MODEL_NAME}|{BACKEND}|{profile}|{CURRENT_YEAR}"
+
+def range_key(preferred_range):
+    return "any" if not preferred_range else f"{preferred_range[0]}-{preferred_range[1]}"
+
+def store_query_key(query):
+    """Text form of a pipeline query_key tuple."""
+    return json.dumps(list(query), default=str)
+
+def _chunks(items, size=SQL_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class LeadStore:
+    """
+    SQLite store of deduplicated, scored leads.
+
+    leads:       one row per lead_key with its fields, a content hash, the
+                 unweighted (0–1) content-only components and the model
+                 versions they were computed with
+    totals:      the weighted total per (size range, lead), indexed for top-k
+    query_leads: the ranked leads of each stored query
+    queries:     stored queries; scanned_k is the top_k they were ranked with
+                 (NULL = every lead scored)
+    When WEIGHTS change, totals are recomputed from the stored components
+    without running any model. Leads whose content or model versions changed
+    are rescored; the rest take their score from the store.
+    """
+
+    def __init__(self, path=STORE_PATH, weights=None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.weights = weights or WEIGHTS
+        self.models = model_versions()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS leads ("
+            " key TEXT PRIMARY KEY, " + ", ".join(FIELDS) + ", content_hash TEXT, "
+            + ", ".join(f"c_{name} REAL" for name in STORED_COMPONENTS) + ", models TEXT, updated REAL);"
+            "CREATE TABLE IF NOT EXISTS totals ("
+            " range_key TEXT, key TEXT, c_size REAL, total REAL, PRIMARY KEY (range_key, key));"
+            "CREATE INDEX IF NOT EXISTS totals_rank ON totals (range_key, total DESC);"
+            "CREATE TABLE IF NOT EXISTS query_leads ("
+            " query_key TEXT, key TEXT, position INTEGER, PRIMARY KEY (query_key, key));"
+            "CREATE INDEX IF NOT EXISTS query_leads_key ON query_leads (key);"
+            "CREATE TABLE IF NOT EXISTS queries (query_key TEXT PRIMARY KEY, scanned_k INTEGER, updated REAL);"
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);"
+        )
+        self._sync_weights()
+
+    def _sync_weights(self):
+        """Recompute every stored total if WEIGHTS changed since the store was written."""
+        weights = json.dumps(self.weights, sort_keys=True)
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'weights'").fetchone()
+        if row is not None and row[0] == weights:
+            return
+        rows = self._conn.execute(
+            "SELECT t.range_key, t.key, t.c_size, " + ", ".join(f"l.c_{name}" for name in STORED_COMPONENTS)
+            + " FROM totals t JOIN leads l ON l.key = t.key"
+        ).fetchall()
+        with span("store.reweight", rows=len(rows)):
+            if rows:
+                values = np.array([r[2:] for r in rows], dtype=float)
+                components = {"size": values[:, 0]}
+                components.update({name: values[:, j + 1] for j, name in enumerate(STORED_COMPONENTS)})
+                totals = round_scores(weighted_total(components, self.weights))
+                self._conn.executemany(
+                    "UPDATE totals SET total = ? WHERE range_key = ? AND key = ?",
+                    [(float(total), r[0], r[1]) for total, r in zip(totals, rows)]
+                )
+            # A top-k ranking pruned leads with the old weights' bounds: it has to be rerun
+            self._conn.execute("DELETE FROM queries WHERE scanned_k IS NOT NULL")
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('weights', ?)", (weights,))
+            self._conn.commit()
+
+    def apply(self, batch, preferred_range=None):
+        """
+        Fill the missing (NaN) scores of `batch` in place from stored components
+        whose content hash and model versions still match. Returns the lead
+        keys and content hashes of the batch, for save().
+        """
+        keys = [lead_key(*row) for row in zip(batch.name, batch.phone, batch.location)]
+        hashes = [content_hash(batch, i) for i in range(len(batch))]
+        missing = np.flatnonzero(np.isnan(batch.score))
+        if not len(missing):
+            return keys, hashes
+        stored = {}
+        with self._lock:
+            for chunk in _chunks(list({keys[i] for i in missing})):
+                stored.update((row[0], row[1:]) for row in self._conn.execute(
+                    "SELECT key, content_hash, models, " + ", ".join(f"c_{name}" for name in STORED_COMPONENTS)
+                    + f" FROM leads WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+                ))
+        hits = [i for i in missing
+                if keys[i] in stored and stored[keys[i]][0] == hashes[i] and stored[keys[i]][1] == self.models]
+        with span("store.apply", rows=len(missing), hits=len(hits)):
+            if hits:
+                values = np.array([stored[keys[i]][2:] for i in hits], dtype=float)
+                components = {name: values[:, j] for j, name in enumerate(STORED_COMPONENTS)}
+                components["size"] = compute_size_scores(batch.size[hits], preferred_range, weight=1.0)
+                batch.score[hits] = round_scores(weighted_total(components, self.weights))
+        return keys, hashes
+
+    def save(self, batch, keys, hashes, components, preferred_range=None):
+        """
+        Upsert the leads scored in this run (non-NaN `components`, as collected by
+        fill_scores) and the totals of every scored lead of `batch` that the
+        store knows. A lead whose content changed drops its old totals and the
+        stored queries that ranked it.
+        """
+        scored = np.flatnonzero(~np.isnan(components["sentiment"]))
+        now = time.time()
+        rkey = range_key(preferred_range)
+        sizes = compute_size_scores(batch.size, preferred_range, weight=1.0)
+        with self._lock, span("store.save", rows=len(scored)):
+            new_hashes = {keys[i]: hashes[i] for i in scored}
+            changed = []
+            for chunk in _chunks(list(new_hashes)):
+                changed += [key for key, old_hash in self._conn.execute(
+                    f"SELECT key, content_hash FROM leads WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+                ) if old_hash != new_hashes[key]]
+            for chunk in _chunks(changed):
+                marks = ", ".join("?" * len(chunk))
+                self._conn.execute(f"DELETE FROM totals WHERE key IN ({marks})", chunk)
+                self._conn.execute(
+                    f"DELETE FROM queries WHERE query_key IN (SELECT query_key FROM query_leads WHERE key IN ({marks}))",
+                    chunk
+                )
+            columns = FIELDS + ["content_hash"] + [f"c_{name}" for name in STORED_COMPONENTS] + ["models", "updated"]
+            self._conn.executemany(
+                f"INSERT INTO leads (key, {', '.join(columns)}) VALUES ({', '.join('?' * (len(columns) + 1))})"
+                " ON CONFLICT (key) DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in columns),
+                [
+                    (keys[i], *(_sql_value(batch.columns[f][i]) for f in FIELDS), hashes[i],
+                     *(float(components[name][i]) for name in STORED_COMPONENTS), self.models, now)
+                    for i in scored
+                ]
+            )
+            self._conn.executemany(
+                "INSERT INTO totals (range_key, key, c_size, total)"
+                " SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM leads WHERE key = ? AND content_hash = ? AND models = ?)"
+                " ON CONFLICT (range_key, key) DO UPDATE SET c_size = excluded.c_size, total = excluded.total",
+                [
+                    (rkey, keys[i], float(sizes[i]), float(batch.score[i]), keys[i], hashes[i], self.models)
+                    for i in np.flatnonzero(~np.isnan(batch.score))
+                ]
+            )
+            self._conn.commit()
+
+    def record_query(self, query, ranked, top_k=None):
+        """Store `ranked` (a LeadBatch by descending score) as the ranking of `query`."""
+        qkey = store_query_key(query)
+        keys = [lead_key(*row) for row in zip(ranked.name, ranked.phone, ranked.location)]
+        with self._lock:
+            self._conn.execute("DELETE FROM query_leads WHERE query_key = ?", (qkey,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO query_leads (query_key, key, position) VALUES (?, ?, ?)",
+                [(qkey, key, position) for position, key in enumerate(keys)]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO queries (query_key, scanned_k, updated) VALUES (?, ?, ?)",
+                (qkey, top_k, time.time())
+            )
+            self._conn.commit()
+
+    def top_k(self, query, preferred_range=None, k=None, max_age=None):
+        """
+        Stored ranking of `query` as a LeadBatch (best `k` if given), read in
+        total order from the totals index; None if the query is not stored, is
+        older than `max_age` seconds, or was ranked with a smaller top_k.
+        """
+        qkey = store_query_key(query)
+        with self._lock:
+            row = self._conn.execute("SELECT scanned_k, updated FROM queries WHERE query_key = ?", (qkey,)).fetchone()
+            if row is None or (max_age is not None and time.time() - row[1] > max_age):
+                return None
+            if row[0] is not None and (k is None or k > row[0]):
+                return None
+            rows = self._conn.execute(
+                "SELECT " + ", ".join(f"l.{f}" for f in FIELDS) + ", t.total"
+                " FROM query_leads q JOIN totals t ON t.range_key = ? AND t.key = q.key"
+                " JOIN leads l ON l.key = q.key"
+                " WHERE q.query_key = ? AND l.models = ? ORDER BY t.total DESC, q.position LIMIT ?",
+                (range_key(preferred_range), qkey, self.models, -1 if k is None else k)
+            ).fetchall()
+        return LeadBatch({f: [r[j] for r in rows] for j, f in enumerate(FIELDS + ["score"])})
+
+    def stats(self):
+        with self._lock:
+            return {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("leads", "totals", "queries")
+            }
+
+    def clear(self):
+        with self._lock:
+            for table in ("leads", "totals", "query_leads", "queries"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.commit()
+
+def _sql_value(value):
+    if isinstance(value, float):
+        return None if value != value else value
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    return value
+
+def get_lead_store():
+    """The shared lead store, or None when LEAD_STORE=0."""
+    global _store
+    if not STORE_ENABLED:
+        return None
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = LeadStore()
+    return _store
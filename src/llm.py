@@ -1,20 +1,50 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import threading
 
-MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+from src.models import BACKEND, SENTIMENT_MODEL_NAME, sentiment_probs
+from src.vector_cache import VectorCache
 
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+MODEL_NAME = SENTIMENT_MODEL_NAME
+
+# DistilBERT itself is loaded lazily by src.models on the first cache miss
+_cache_lock = threading.Lock()
+_sentiment_cache = None
+
+def get_sentiment_cache():
+    """
+    The shared on-disk sentiment cache, opened on first use. Entries are keyed
+    by model and inference backend, since torch, ONNX and int8 outputs differ.
+    """
+    global _sentiment_cache
+    if _sentiment_cache is None:
+        with _cache_lock:
+            if _sentiment_cache is None:
+                _sentiment_cache = VectorCache("sentiment", f"{MODEL_NAME}|{BACKEND}", dim=1, capacity=200_000)
+    return _sentiment_cache
+
+def sentiment_text(lead):
+    """
+    Text fed to DistilBERT: the lead's snippet, or (industry + location) fallback.
+    """
+    return lead.get("snippet") or f"{lead.get('industry')} {lead.get('location')}"
+
+def sentiment_texts(batch):
+    """sentiment_text for every lead of a LeadBatch, built from its columns."""
+    return [
+        snippet or f"{industry} {location}"
+        for snippet, industry, location in zip(batch.snippet, batch.industry, batch.location)
+    ]
 
 def sentiment_score(lead):
     """
     Returns a float (0–1) representing the probability of positive sentiment
     for the lead’s snippet or (industry + location) fallback.
     """
-    text = lead.get("snippet") or f"{lead.get('industry')} {lead.get('location')}"
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=128)
-    with torch.no_grad():
-        outputs = model(**inputs)
-    logits = outputs.logits
-    prob = torch.softmax(logits, dim=1)[0][1].item()  # positive class prob
-    return prob
+    return sentiment_scores([sentiment_text(lead)])[0]
+
+def sentiment_scores(texts):
+    """
+    Batched variant of sentiment_score over a list of texts; returns a list of P(positive).
+    Texts already in the on-disk sentiment cache skip inference; the rest go
+    through the shared model service in padded mini-batches.
+    """
+    return get_sentiment_cache().get_or_compute(texts, sentiment_probs)[:, 0].astype(float).tolist()
@@ -0,0 +1,155 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+SENTIMENT_MODEL_NAME = "distilbert-base-uncased-finetuned-sst-2-english"
+EMBED_BATCH_SIZE = 64
+SENTIMENT_BATCH_SIZE = 32
+
+# "torch" (default), "int8" (dynamic-quantized Linear layers) or "onnx" (needs optimum/onnxruntime)
+BACKEND = os.environ.get("LEAD_MODEL_BACKEND", "torch")
+NUM_THREADS = int(os.environ.get("LEAD_MODEL_THREADS", "0")) or None
+COALESCE_WAIT = 0.005  # seconds a batch waits for more concurrent requests
+COALESCE_MAX_TEXTS = 256
+
+# Models are created on first use and shared by every caller (and every
+# Streamlit session) in the process.
+_lock = threading.Lock()
+_models = {}
+
+def _set_threads():
+    if NUM_THREADS:
+        import torch
+        torch.set_num_threads(NUM_THREADS)
+
+def _load_embedder():
+    from sentence_transformers import SentenceTransformer
+    if BACKEND == "onnx":
+        try:
+            return SentenceTransformer(EMBED_MODEL_NAME, backend="onnx")
+        except:
+            pass  # older sentence-transformers or no onnxruntime: use torch
+    model = SentenceTransformer(EMBED_MODEL_NAME)
+    if BACKEND == "int8":
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+def _load_sentiment():
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL_NAME)
+    if BACKEND == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+            return tokenizer, ORTModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL_NAME, export=True)
+        except ImportError:
+            pass
+    model = AutoModelForSequenceClassification.from_pretrained(SENTIMENT_MODEL_NAME)
+    model.eval()
+    if BACKEND == "int8":
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, model
+
+_LOADERS = {"embedder": _load_embedder, "sentiment": _load_sentiment}
+
+def get_model(name):
+    """
+    Return the shared instance of model `name` ("embedder" or "sentiment"), loading it on first use.
+    """
+    model = _models.get(name)
+    if model is None:
+        with _lock:
+            model = _models.get(name)
+            if model is None:
+                _set_threads()
+                model = _models[name] = _LOADERS[name]()
+    return model
+
+def get_embedder():
+    return get_model("embedder")
+
+def loaded_models():
+    return sorted(_models)
+
+class BatchCoalescer:
+    """
+    Single worker thread that owns inference for one model.
+
+    Concurrent callers submit lists of texts; requests arriving within
+    COALESCE_WAIT of each other are merged into one `fn` call (up to
+    COALESCE_MAX_TEXTS texts) and each caller gets back its own slice.
+    """
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.calls = 0  # batched fn invocations, for instrumentation
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+
+    def submit(self, texts):
+        future = Future()
+        if not texts:
+            future.set_result([])
+            return future
+        self._ensure_worker()
+        self._queue.put((list(texts), future))
+        return future
+
+    def __call__(self, texts):
+        return self.submit(texts).result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            while size < COALESCE_MAX_TEXTS:
+                try:
+                    item = self._queue.get(timeout=COALESCE_WAIT)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            texts = [t for item_texts, _ in batch for t in item_texts]
+            self.calls += 1
+            try:
+                results = self.fn(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            start = 0
+            for item_texts, future in batch:
+                future.set_result(results[start:start + len(item_texts)])
+                start += len(item_texts)
+
+def _encode(texts):
+    return get_embedder().encode(
+        texts, batch_size=EMBED_BATCH_SIZE, convert_to_numpy=True, normalize_embeddings=True
+    )
+
+def _positive_probs(texts):
+    import torch
+    tokenizer, model = get_model("sentiment")
+    probs = []
+    for start in range(0, len(texts), SENTIMENT_BATCH_SIZE):
+        chunk = texts[start:start + SENTIMENT_BATCH_SIZE]
+        inputs = tokenizer(chunk, return_tensors="pt", truncation=True, max_length=128, padding=True)
+        with torch.no_grad():
+            outputs = model(**inputs)
+        probs.extend(torch.softmax(outputs.logits, dim=1)[:, 1].tolist())  # positive class prob
+    return probs
+
+# Thread-safe, request-coalescing entry points used by evaluation.py and llm.py
+encode_texts = BatchCoalescer(_encode)
+sentiment_probs = BatchCoalescer(_positive_probs)
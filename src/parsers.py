@@ -0,0 +1,190 @@
+import os
+import threading
+
+# "auto" (selectolax, then lxml, then BeautifulSoup), or one of BACKENDS
+PARSER = os.environ.get("LEAD_HTML_PARSER", "auto")
+
+class SoupBackend:
+    """BeautifulSoup with the stdlib html.parser; selectors precompiled with soupsieve."""
+    name = "bs4"
+
+    def __init__(self):
+        import soupsieve
+        from bs4 import BeautifulSoup
+        self._soupsieve = soupsieve
+        self._soup = BeautifulSoup
+
+    def compile(self, selector):
+        return self._soupsieve.compile(selector)
+
+    def parse(self, html):
+        return self._soup(html, "html.parser")
+
+    def select(self, node, compiled):
+        return compiled.iselect(node)
+
+    def select_one(self, node, compiled):
+        return compiled.select_one(node)
+
+    def text(self, node):
+        return node.get_text(strip=True)
+
+    def attr(self, node, name):
+        return node.get(name)
+
+class LxmlBackend:
+    """lxml.html with selectors compiled once to XPath by cssselect."""
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+        self._html = lxml.html
+        self._selector = CSSSelector
+
+    def compile(self, selector):
+        return self._selector(selector)
+
+    def parse(self, html):
+        return self._html.fromstring(html) if html.strip() else None
+
+    def select(self, node, compiled):
+        return compiled(node) if node is not None else []
+
+    def select_one(self, node, compiled):
+        found = compiled(node)
+        return found[0] if found else None
+
+    def text(self, node):
+        return "".join(part.strip() for part in node.itertext())
+
+    def attr(self, node, name):
+        return node.get(name)
+
+class SelectolaxBackend:
+    """selectolax's lexbor C parser; selectors are matched natively."""
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def compile(self, selector):
+        return selector
+
+    def parse(self, html):
+        return self._parser(html)
+
+    def select(self, node, compiled):
+        return node.css(compiled)
+
+    def select_one(self, node, compiled):
+        return node.css_first(compiled)
+
+    def text(self, node):
+        return node.text(deep=True, separator="", strip=True)
+
+    def attr(self, node, name):
+        return node.attributes.get(name)
+
+BACKENDS = {"selectolax": SelectolaxBackend, "lxml": LxmlBackend, "bs4": SoupBackend}
+
+_lock = threading.Lock()
+_backends = {}
+
+def get_backend(name=None):
+    """
+    Shared parser backend `name` (default: LEAD_HTML_PARSER). "auto" picks the
+    first of selectolax, lxml and bs4 that is installed.
+    """
+    name = name or PARSER
+    backend = _backends.get(name)
+    if backend is None:
+        with _lock:
+            backend = _backends.get(name)
+            if backend is None:
+                if name == "auto":
+                    for candidate in BACKENDS.values():
+                        try:
+                            backend = candidate()
+                            break
+                        except ImportError:
+                            continue
+                else:
+                    backend = BACKENDS[name]()
+                _backends[name] = backend
+    return backend
+
+class Field:
+    """
+    One value of a result entry: the stripped text (or attribute `attr`) of the
+    first element matching `selector`, passed through `convert` if given.
+    `default` is used when nothing matches.
+    """
+
+    def __init__(self, selector, attr=None, convert=None, default=None):
+        self.selector = selector
+        self.attr = attr
+        self.convert = convert
+        self.default = default
+
+    def extract(self, backend, entry, compiled):
+        node = backend.select_one(entry, compiled)
+        if node is None:
+            return self.default
+        value = backend.attr(node, self.attr) if self.attr else backend.text(node)
+        if value is not None and self.convert is not None:
+            value = self.convert(value)
+        return value
+
+class SourceSpec:
+    """
+    Declarative extraction rules for one source's result page.
+
+    entries:      selector of one result entry
+    fields:       {lead field: Field}; "name" is required and extracted first,
+                  entries without a name are skipped
+    query_fields: {lead field: "keyword" | "location"} filled from the query
+                  where the page gives no value
+    finish:       optional fn(values) adjusting the extracted dict in place
+    Selectors are compiled once per backend.
+    """
+
+    def __init__(self, entries, fields, query_fields=None, finish=None):
+        self.entries = entries
+        self.fields = fields
+        self.query_fields = query_fields or {}
+        self.finish = finish
+        self._compiled = {}
+
+    def compiled(self, backend):
+        compiled = self._compiled.get(backend.name)
+        if compiled is None:
+            compiled = self._compiled[backend.name] = (
+                backend.compile(self.entries),
+                {field: backend.compile(spec.selector) for field, spec in self.fields.items()}
+            )
+        return compiled
+
+    def iter_entries(self, html, query, backend=None):
+        """
+        Yield one dict of lead fields per named entry, extracting each entry's
+        fields only when the consumer asks for it.
+        """
+        backend = backend or get_backend()
+        entry_selector, selectors = self.compiled(backend)
+        root = backend.parse(html)
+        other_fields = [field for field in self.fields if field != "name"]
+        for entry in backend.select(root, entry_selector):
+            name = self.fields["name"].extract(backend, entry, selectors["name"])
+            if not name:
+                continue
+            values = {"name": name}
+            for field in other_fields:
+                values[field] = self.fields[field].extract(backend, entry, selectors[field])
+            for field, key in self.query_fields.items():
+                if values.get(field) is None:
+                    values[field] = query[key]
+            if self.finish is not None:
+                self.finish(values)
+            yield values
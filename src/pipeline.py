@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+
+from src.data_loader import companies_to_leads, filter_companies
+from src.dedup import dedup_leads
+from src.evaluation import empty_components, fill_scores, order_by_score
+from src.geocode import get_geocoder
+from src.lead import LeadBatch
+from src.lead_store import get_lead_store
+from src.result_cache import ResultCache
+from src.scraper import SOURCES, iter_search_all, search_all
+from src.tracing import span
+from src.vector_index import semantic_companies
+
+KAGGLE_LIMIT = 500
+SCRAPE_MAX_RESULTS = 10
+
+# Results shared across sessions: full rankings expire with their live-scraped part,
+# while the scored Kaggle candidates of a query (static dataset) live longer
+RESULT_TTL = 10 * 60
+KAGGLE_TTL = 60 * 60
+MAX_CACHED_LEADS = 200_000  # per cache, counted in leads
+
+search_cache = ResultCache(ttl=RESULT_TTL, max_weight=MAX_CACHED_LEADS)
+kaggle_cache = ResultCache(ttl=KAGGLE_TTL, max_weight=MAX_CACHED_LEADS)
+
+# Size options offered in the UI / accepted by the batch CLI
+SIZE_RANGES = {
+    "Any": None,
+    "Small (1–50)": (1, 50),
+    "Medium (51–500)": (51, 500),
+    "Large (501+)": (501, float("inf"))
+}
+SIZE_ALIASES = {"": "Any", "any": "Any", "small": "Small (1–50)", "medium": "Medium (51–500)", "large": "Large (501+)"}
+
+def size_range(option):
+    """
+    Numeric (low, high) range for a size option ("Small (1–50)" or "small"); None for Any.
+    """
+    option = option or ""
+    if option in SIZE_RANGES:
+        return SIZE_RANGES[option]
+    return SIZE_RANGES[SIZE_ALIASES.get(option.strip().lower(), "Any")]
+
+def query_key(keyword, location, category="", preferred_range=None):
+    """Normalized query tuple: case and whitespace differences map to the same key."""
+    return tuple(" ".join(part.lower().split()) for part in (keyword, location, category)) + (preferred_range,)
+
+def filter_scraped(leads, cat_lower):
+    """If a category is specified, keep scraped leads whose industry contains it."""
+    if not cat_lower:
+        return list(leads)
+    return [lead for lead in leads if cat_lower in lead.get("industry", "").lower()]
+
+def kaggle_candidates(keyword, location, category="", preferred_range=None):
+    """
+    Kaggle leads for a query: substring matches on name/industry and
+    city/state/country name (size preference applied before the row limit),
+    plus semantic matches from the FAISS index when it has been built.
+    """
+    kw_lower = keyword.lower()
+    loc_lower = location.lower()
+    cat_lower = category.lower()
+    df_filtered = filter_companies(kw_lower, loc_lower, cat_lower, limit=KAGGLE_LIMIT, size_range=preferred_range)
+    # Add companies that match the keyword in meaning but not by substring
+    with span("semantic_candidates") as sp:
+        df_semantic = semantic_companies(keyword, loc_lower, cat_lower, size_range=preferred_range)
+        if df_semantic is not None:
+            df_filtered = pd.concat([df_filtered, df_semantic[~df_semantic.index.isin(df_filtered.index)]])
+            sp.set(rows=len(df_semantic))
+    return companies_to_leads(df_filtered)
+
+def score_stored(leads, preferred_range=None, top_k=None):
+    """
+    fill_scores through the lead store: missing scores are first taken from
+    stored components (unchanged leads, same models), the models run only on the
+    rest, and what they compute is stored. Same return value as fill_scores.
+    """
+    store = get_lead_store()
+    if store is None:
+        return fill_scores(leads, preferred_range, top_k)
+    keys, hashes = store.apply(leads, preferred_range)
+    components = empty_components(len(leads))
+    ranked = fill_scores(leads, preferred_range, top_k, components)
+    store.save(leads, keys, hashes, components, preferred_range)
+    return ranked
+
+def scored_kaggle_candidates(keyword, location, category="", preferred_range=None, top_k=None):
+    """
+    Deduplicated Kaggle candidates with their scores, cached across sessions for
+    KAGGLE_TTL. With `top_k`, candidates that cannot reach the top k are left
+    unscored (NaN) and scored later only if a ranking needs them.
+    Treat the returned LeadBatch as read-only.
+    """
+    def compute():
+        with span("dedup.kaggle") as sp:
+            leads = dedup_leads(kaggle_candidates(keyword, location, category, preferred_range))
+            sp.set(kept=len(leads))
+        leads.score[:] = np.nan
+        with span("score_leads", rows=len(leads)):
+            score_stored(leads, preferred_range, top_k)
+        return leads
+
+    return kaggle_cache.get_or_compute(query_key(keyword, location, category, preferred_range), compute)
+
+def unscored(leads):
+    """LeadBatch copy of `leads` with every score cleared (NaN)."""
+    batch = LeadBatch.from_leads(leads)
+    return LeadBatch({**batch.columns, "score": np.full(len(batch), np.nan)})
+
+def rank_leads(leads, preferred_range=None, top_k=None):
+    """
+    Collapse near-duplicates across all sources, then score (0–100 scale).
+    Leads that still carry a score (NaN = unscored) keep it, so cached Kaggle
+    scores are reused; the rest go through the lead store (see score_stored). Returns a LeadBatch by descending score, only the best
+    `top_k` if given.
+    """
+    with span("dedup", rows=len(leads)) as sp:
+        all_leads = dedup_leads(leads)
+        sp.set(kept=len(all_leads))
+    if not all_leads:
+        return all_leads
+    with span("score_leads", rows=len(all_leads)):
+        return order_by_score(all_leads, score_stored(all_leads, preferred_range, top_k))
+
+def record_ranking(keyword, location, category, preferred_range, ranked, top_k=None):
+    """Keep a finished ranking in the lead store, for stored_ranking."""
+    store = get_lead_store()
+    if store is not None:
+        store.record_query(query_key(keyword, location, category, preferred_range), ranked, top_k)
+
+def stored_ranking(keyword, location, category="", preferred_range=None, top_k=None, max_age=None):
+    """
+    The last ranking recorded for a query, read from the lead store's indexed
+    totals without scraping or running a model (rescored there if WEIGHTS
+    changed). None if there is none usable (see LeadStore.top_k).
+    """
+    store = get_lead_store()
+    if store is None:
+        return None
+    return store.top_k(query_key(keyword, location, category, preferred_range), preferred_range, top_k, max_age)
+
+def run_search(keyword, location, category="", preferred_range=None,
+               max_scraped=SCRAPE_MAX_RESULTS, top_k=None):
+    """
+    Full lead pipeline for one query: live scraping, Kaggle filtering (substring
+    plus semantic candidates), cross-source dedup and scoring.
+    Returns a LeadBatch sorted by descending score (empty if none matched);
+    with `top_k`, only the best `top_k`.
+    Results are shared across sessions for RESULT_TTL and concurrent identical
+    queries wait on one computation; treat the returned LeadBatch as read-only.
+    """
+    key = query_key(keyword, location, category, preferred_range) + (max_scraped, top_k)
+    return search_cache.get_or_compute(
+        key, lambda: _run_search(keyword, location, category, preferred_range, max_scraped, top_k)
+    )
+
+def _run_search(keyword, location, category, preferred_range, max_scraped, top_k):
+    with span("scrape", sources=3):
+        scraped = search_all(keyword, location, max_results=max_scraped)
+    scraped_all = filter_scraped([lead for leads in scraped.values() for lead in leads], category.lower())
+    kaggle_leads = scored_kaggle_candidates(keyword, location, category, preferred_range, top_k)
+    # Scraped leads go first so they win dedup ties
+    ranked = rank_leads(LeadBatch.concat([unscored(scraped_all), kaggle_leads]), preferred_range, top_k)
+    record_ranking(keyword, location, category, preferred_range, ranked, top_k)
+    return ranked
+
+def stream_search(keyword, location, category="", preferred_range=None,
+                  max_scraped=SCRAPE_MAX_RESULTS, top_k=None):
+    """
+    Incremental run_search: scrapers start first, the local Kaggle candidates are
+    ranked while they run, and the ranking is refreshed as each source finishes.
+    Yields (stage, ranked_leads) with stage "kaggle" then each source name; the
+    last ranking equals run_search's result. Re-ranking is cheap because Kaggle
+    scores are kept and model outputs for already-seen leads come from the
+    on-disk caches.
+    A query already answered (or being answered) by run_search/stream_search
+    yields a single ("cache", ranked_leads) instead.
+    """
+    key = query_key(keyword, location, category, preferred_range) + (max_scraped, top_k)
+    status, found = search_cache.lookup(key)
+    if status == "hit":
+        yield "cache", found
+        return
+    if status == "wait":
+        try:
+            yield "cache", found.result()
+            return
+        except Exception:
+            found = None  # the other run failed: compute here, without caching
+    ranked = None
+    try:
+        for stage, ranked in _stream_search(keyword, location, category, preferred_range, max_scraped, top_k):
+            yield stage, ranked
+    except BaseException as e:
+        if found is not None:
+            search_cache.resolve(key, found, error=e)
+        raise
+    if found is not None:
+        search_cache.resolve(key, found, ranked)
+
+def _stream_search(keyword, location, category, preferred_range, max_scraped, top_k):
+    scrapes = iter_search_all(keyword, location, max_results=max_scraped)
+    kaggle_leads = scored_kaggle_candidates(keyword, location, category, preferred_range, top_k)
+    ranked = rank_leads(kaggle_leads, preferred_range, top_k)
+    yield "kaggle", ranked
+
+    scraped = {}
+    for source, leads in scrapes:
+        scraped[source] = filter_scraped(leads, category.lower())
+        # Keep run_search's source order so dedup picks the same keepers
+        scraped_all = [lead for src in SOURCES if src in scraped for lead in scraped[src]]
+        ranked = rank_leads(LeadBatch.concat([unscored(scraped_all), kaggle_leads]), preferred_range, top_k)
+        yield source, ranked
+    record_ranking(keyword, location, category, preferred_range, ranked, top_k)
+
+def geocode_leads(leads):
+    """
+    (latitude, longitude) per lead via the cached, rate-limited geocoder;
+    (None, None) where the location is empty or not found.
+    """
+    return get_geocoder().geocode_many([loc or "" for loc in LeadBatch.from_leads(leads).location])
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+def _weight(value):
+    return max(len(value), 1)
+
+class ResultCache:
+    """
+    In-process cache of computed results, shared by every caller (and every
+    Streamlit session) in the process.
+
+    Entries expire `ttl` seconds after they are stored; the total weight of the
+    entries (len(value) by default, e.g. leads in a LeadBatch) is kept under
+    `max_weight` by evicting the least recently used. Identical concurrent
+    requests are coalesced: the first caller computes, the rest wait on its Future.
+    """
+
+    def __init__(self, ttl, max_weight, weigh=_weight):
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires, weight, value)
+        self._pending = {}  # key -> Future of the in-flight computation
+        self._weight = 0
+
+    def lookup(self, key):
+        """
+        ("hit", value) for a live entry; ("wait", future) when an identical
+        computation is in flight; otherwise ("own", future), and the caller must
+        compute the value and hand it to resolve(key, future, ...).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return "hit", entry[2]
+                self._drop(key)
+            future = self._pending.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return "wait", future
+            self.misses += 1
+            future = self._pending[key] = Future()
+            return "own", future
+
+    def resolve(self, key, future, value=None, error=None):
+        """
+        Finish an owned computation: store `value` and wake the waiters, or pass
+        them `error` (nothing is stored).
+        """
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            if error is None:
+                self._store(key, value)
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error if isinstance(error, Exception) else RuntimeError("computation abandoned"))
+
+    def get_or_compute(self, key, compute):
+        """Cached value for `key`, computing it once across concurrent callers."""
+        status, found = self.lookup(key)
+        if status == "hit":
+            return found
+        if status == "wait":
+            try:
+                return found.result()
+            except Exception:
+                return compute()  # the owner failed; compute without caching
+        try:
+            value = compute()
+        except BaseException as e:
+            self.resolve(key, found, error=e)
+            raise
+        self.resolve(key, found, value)
+        return value
+
+    def _store(self, key, value):
+        weight = self.weigh(value)
+        self._drop(key)
+        if weight > self.max_weight:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, weight, value)
+        self._weight += weight
+        while self._weight > self.max_weight:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._weight -= entry[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "weight": self._weight,
+                "max_weight": self.max_weight,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._weight = 0
@@ -1,175 +1,354 @@
+import contextvars
+import os
 import requests
 import random
+import threading
 import time
-from bs4 import BeautifulSoup
-from fuzzywuzzy import fuzz
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+from itertools import islice
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from src.http_cache import HttpCache, cache_key
+from src.lead import Lead
+from src.parsers import Field, SourceSpec, get_backend
+from src.tracing import span
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
     "Mozilla/5.0 (X11; Linux x86_64)",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"
 ]
-name_cache = []
+REQUEST_TIMEOUT = 5
+MIN_HOST_INTERVAL = 1.0  # seconds between requests to the same host
+MAX_PAGES = 5
+DEADLINE_GRACE = 1.0  # extra seconds search_all waits for scrapers to return partial results
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.5  # seconds before the first retry; doubles after each one
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Result pages are served from data/cache/http.sqlite for CACHE_TTL[source] seconds
+CACHE_TTL = {
+    "yellowpages": 6 * 3600,
+    "yelp": 6 * 3600,
+    "manta": 24 * 3600
+}
+DEFAULT_CACHE_TTL = 6 * 3600
+STALE_WHILE_REVALIDATE = 24 * 3600  # serve an expired page this much longer while refreshing it (0 = off)
+CACHE_ENABLED = os.environ.get("LEAD_HTTP_CACHE", "1") not in ("", "0", "false")
+
+# Pooled keep-alive session shared by all scrapers
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+
+_host_lock = threading.Lock()
+_host_next_slot = {}
+
+_cache_lock = threading.Lock()
+_http_cache = None
+_revalidating = set()
+_revalidate_pool = ThreadPoolExecutor(max_workers=2)
 
 def random_headers():
     return {"User-Agent": random.choice(USER_AGENTS)}
 
-def attempt_request(url, params=None):
+def time_left(deadline):
+    """
+    Seconds remaining before an absolute `deadline` (time.monotonic()); None means no deadline.
+    """
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def wait_for_host(url):
+    """
+    Per-host rate limit: block until this host's next request slot.
+    """
+    host = urlsplit(url).netloc
+    with _host_lock:
+        now = time.monotonic()
+        slot = max(now, _host_next_slot.get(host, now))
+        _host_next_slot[host] = slot + MIN_HOST_INTERVAL
+    if slot > now:
+        time.sleep(slot - now)
+
+def attempt_request(url, params=None, deadline=None, headers=None):
+    """
+    GET with the shared session, per-host rate limit and deadline. Connection
+    errors, timeouts and RETRY_STATUSES responses are retried up to MAX_RETRIES
+    times with exponential backoff (never past the deadline).
+    Returns the last response, or None if no response was received.
+    """
+    response = None
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            delay = BACKOFF_BASE * 2 ** (attempt - 1)
+            remaining = time_left(deadline)
+            if remaining is not None and remaining <= delay:
+                break
+            time.sleep(delay)
+        try:
+            wait_for_host(url)
+            timeout = REQUEST_TIMEOUT
+            remaining = time_left(deadline)
+            if remaining is not None:
+                if remaining <= 0:
+                    break
+                timeout = min(timeout, remaining)
+            response = session.get(
+                url, params=params, headers={**random_headers(), **(headers or {})}, timeout=timeout
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            continue
+        except:
+            return None
+        if response.status_code not in RETRY_STATUSES:
+            break
+    return response
+
+def get_http_cache():
+    """The shared on-disk page cache, or None when LEAD_HTTP_CACHE=0."""
+    global _http_cache
+    if not CACHE_ENABLED:
+        return None
+    if _http_cache is None:
+        with _cache_lock:
+            if _http_cache is None:
+                _http_cache = HttpCache()
+    return _http_cache
+
+def _yellowpages_location(values):
+    street, locality = values.pop("street"), values.pop("locality")
+    if street is not None or locality is not None:
+        values["location"] = f"{street or ''}, {locality or ''}"
+
+def _rating_from_label(label):
     try:
-        return requests.get(url, params=params, headers=random_headers(), timeout=5)
+        return float(label.split()[0])
     except:
         return None
 
-def fuzzy_unique(name):
+# Site-specific extraction rules; see src.parsers.SourceSpec
+PAGE_SPECS = {
+    "yellowpages": SourceSpec(
+        entries=".result",
+        fields={
+            "name": Field(".business-name span"),
+            "phone": Field(".phones.phone"),
+            "industry": Field(".categories", default=""),
+            "street": Field(".street-address"),
+            "locality": Field(".locality")
+        },
+        finish=_yellowpages_location
+    ),
+    "yelp": SourceSpec(
+        entries=".container__09f24__21w3G",
+        fields={
+            "name": Field("a.link__09f24__1kwXV"),
+            "rating": Field("div.i-stars__09f24__1T6rz", attr="aria-label", convert=_rating_from_label),
+            "snippet": Field("p.comment__09f24__gu0rG"),
+            "phone": Field("p.text__09f24__2NHRu")
+        },
+        # Yelp doesn't label industry in HTML scrape
+        query_fields={"industry": "keyword", "location": "location"}
+    ),
+    "manta": SourceSpec(
+        entries="div.search-result-card",
+        fields={
+            "name": Field("a.search-result-title"),
+            "industry": Field("div.category", default=""),
+            "location": Field("div.location"),
+            "phone": Field("div.phone"),
+            "website_url": Field("a.website-link", attr="href")
+        },
+        query_fields={"location": "location"}
+    )
+}
+
+def parse_page(source, html, keyword, location, limit=None):
     """
-    Avoid near-duplicate names using fuzzy match (>90% similarity).
+    Leads from one result page of `source`, extracting at most `limit` entries.
+    Returns (leads, complete) where complete means every entry was read.
     """
-    for existing in name_cache:
-        if fuzz.token_sort_ratio(name.lower(), existing.lower()) > 90:
-            return False
-    name_cache.append(name)
-    return True
+    backend = get_backend()
+    with span(f"parse.{source}", backend=backend.name) as sp:
+        entries = PAGE_SPECS[source].iter_entries(html, {"keyword": keyword, "location": location}, backend)
+        leads = [Lead(**values) for values in islice(entries, limit)]
+        complete = limit is None or len(leads) < limit or next(entries, None) is None
+        sp.set(rows=len(leads), complete=complete)
+    return leads, complete
 
-def search_yellowpages(keyword, location, max_results=10):
-    """
-    Scrape YellowPages for keyword+location.
-    Returns list of dicts with keys:
-      name, industry, location, phone, rating=None, snippet=None,
-      website_url=None, year_founded=None, size=None, score=0
+def _cached_leads(entry, parse, limit):
+    parsed = entry.parsed
+    if parsed is not None and (parsed["complete"] or (limit is not None and len(parsed["leads"]) >= limit)):
+        return [Lead(**fields) for fields in parsed["leads"][:limit]]
+    leads, _ = parse(entry.body, limit)  # stored parse is too short: re-parse the cached HTML
+    return leads
+
+def _fetch_and_store(cache, key, url, params, deadline, parse, limit, entry):
+    r = attempt_request(url, params, deadline, headers=entry.validators() if entry else None)
+    if r is not None and r.status_code == 304:
+        if entry is None:
+            return None
+        cache.touch(key)
+        return _cached_leads(entry, parse, limit)
+    if not r:
+        return None
+    leads, complete = parse(r.text, limit)
+    # Empty pages are not stored: they may be bot checks rather than the end of the results
+    if leads:
+        cache.put(key, r.text, r.headers.get("ETag"), r.headers.get("Last-Modified"),
+                  {"leads": [lead.to_dict() for lead in leads], "complete": complete})
+    return leads
+
+def _revalidate_later(cache, key, url, params, parse, limit, entry):
+    with _cache_lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+
+    def run():
+        try:
+            _fetch_and_store(cache, key, url, params, None, parse, limit, entry)
+        finally:
+            with _cache_lock:
+                _revalidating.discard(key)
+
+    _revalidate_pool.submit(run)
+
+def fetch_page(source, url, params=None, deadline=None, parse=None, limit=None):
     """
-    name_cache.clear()
-    base_url = "https://www.yellowpages.com/search"
-    params = {"search_terms": keyword, "geo_location_terms": location}
-    r = attempt_request(base_url, params)
-    leads = []
+    Leads parsed from one result page (at most `limit`), or None if the page
+    could not be fetched. `parse(html, limit)` returns (leads, complete).
 
-    if r:
-        soup = BeautifulSoup(r.text, "html.parser")
-        results = soup.select(".result")[:max_results]
-        for entry in results:
-            name_tag = entry.select_one(".business-name span")
-            phone_tag = entry.select_one(".phones.phone")
-            category_tag = entry.select_one(".categories")
-            street = entry.select_one(".street-address")
-            locality = entry.select_one(".locality")
-
-            name = name_tag.get_text(strip=True) if name_tag else None
-            if not name or not fuzzy_unique(name):
-                continue
-            phone = phone_tag.get_text(strip=True) if phone_tag else None
-            loc = (
-                f"{street.get_text(strip=True)}, {locality.get_text(strip=True)}"
-                if (street or locality) else None
-            )
+    Pages (raw HTML plus parsed leads) are cached on disk under the normalized
+    URL: a copy younger than CACHE_TTL[source] is returned without touching the
+    network or the parser; for STALE_WHILE_REVALIDATE seconds after that it is
+    still returned while a background request refreshes it. Otherwise the page
+    is fetched, conditionally (If-None-Match / If-Modified-Since) when a cached
+    copy exists, and a 304 reuses the cached leads.
+    """
+    cache = get_http_cache()
+    if cache is None:
+        r = attempt_request(url, params, deadline)
+        return parse(r.text, limit)[0] if r else None
+    key = cache_key(url, params)
+    entry = cache.get(key)
+    if entry is not None:
+        ttl = CACHE_TTL.get(source, DEFAULT_CACHE_TTL)
+        if entry.age < ttl:
+            return _cached_leads(entry, parse, limit)
+        if entry.age < ttl + STALE_WHILE_REVALIDATE:
+            _revalidate_later(cache, key, url, params, parse, limit, entry)
+            return _cached_leads(entry, parse, limit)
+    return _fetch_and_store(cache, key, url, params, deadline, parse, limit, entry)
 
-            leads.append({
-                "name": name,
-                "industry": category_tag.get_text(strip=True) if category_tag else "",
-                "location": loc,
-                "phone": phone,
-                "rating": None,
-                "snippet": None,
-                "website_url": None,
-                "year_founded": None,
-                "size": None,
-                "score": 0
-            })
-            time.sleep(0.3)
+def _collect(source, pages, keyword, location, max_results, deadline):
+    """
+    Follow result pages (url, params) until max_results leads are found, a page
+    yields nothing, or the deadline passes. Each page is parsed only as far as
+    the leads still needed. Duplicates are left to src.dedup, which runs across
+    all merged sources.
+    """
+    def parse(html, limit):
+        return parse_page(source, html, keyword, location, limit)
 
+    leads = []
+    for url, params in pages:
+        page_leads = fetch_page(source, url, params, deadline, parse, max_results - len(leads))
+        if not page_leads:
+            break
+        leads.extend(page_leads)
+        if len(leads) >= max_results:
+            break
     return leads
 
-def search_yelp(keyword, location, max_results=10):
+def search_yellowpages(keyword, location, max_results=10, deadline=None):
     """
-    Scrape Yelp for keyword+location. Returns a similar dict structure, but with 'rating' and 'snippet' if available.
+    Scrape YellowPages for keyword+location, following result pages until
+    max_results leads are found or the deadline passes.
+    Returns a list of Lead records (name, industry, location, phone; other fields None).
+    """
+    base_url = "https://www.yellowpages.com/search"
+    pages = (
+        (base_url, {"search_terms": keyword, "geo_location_terms": location, "page": page})
+        for page in range(1, MAX_PAGES + 1)
+    )
+    return _collect("yellowpages", pages, keyword, location, max_results, deadline)
+
+def search_yelp(keyword, location, max_results=10, deadline=None):
+    """
+    Scrape Yelp for keyword+location. Returns Lead records like YellowPages, plus 'rating' and 'snippet' if available.
     """
-    name_cache.clear()
     base_url = (
         f"https://www.yelp.com/search?find_desc="
         f"{keyword.replace(' ', '%20')}&find_loc={location.replace(' ', '%20')}"
     )
-    r = attempt_request(base_url)
-    leads = []
+    pages = ((f"{base_url}&start={page * 10}", None) for page in range(MAX_PAGES))
+    return _collect("yelp", pages, keyword, location, max_results, deadline)
 
-    if r:
-        soup = BeautifulSoup(r.text, "html.parser")
-        listings = soup.select(".container__09f24__21w3G")[:max_results]
-        for entry in listings:
-            name_tag = entry.select_one("a.link__09f24__1kwXV")
-            rating_tag = entry.select_one("div.i-stars__09f24__1T6rz")
-            snippet_tag = entry.select_one("p.comment__09f24__gu0rG")
-            phone_tag = entry.select_one("p.text__09f24__2NHRu")
-
-            name = name_tag.get_text(strip=True) if name_tag else None
-            if not name or not fuzzy_unique(name):
-                continue
-            rating = None
-            if rating_tag and "aria-label" in rating_tag.attrs:
-                try:
-                    rating = float(rating_tag["aria-label"].split()[0])
-                except:
-                    rating = None
-            snippet = snippet_tag.get_text(strip=True) if snippet_tag else None
-            phone = phone_tag.get_text(strip=True) if phone_tag else None
-
-            leads.append({
-                "name": name,
-                "industry": keyword,  # Yelp doesn't label industry in HTML scrape
-                "location": location,
-                "phone": phone,
-                "rating": rating,
-                "snippet": snippet,
-                "website_url": None,
-                "year_founded": None,
-                "size": None,
-                "score": 0
-            })
-            time.sleep(0.3)
-
-    return leads
-
-def search_manta(keyword, location, max_results=10):
+def search_manta(keyword, location, max_results=10, deadline=None):
     """
     Scrape Manta for keyword+location. Returns same structure as YellowPages.
     """
-    name_cache.clear()
     base_url = (
         "https://www.manta.com/search?"
         f"search_source=nav&search_category=businesses&search_term={keyword.replace(' ', '%20')}"
         f"&search_location={location.replace(' ', '%20')}"
     )
-    r = attempt_request(base_url)
-    leads = []
+    pages = ((f"{base_url}&pg={page}", None) for page in range(1, MAX_PAGES + 1))
+    return _collect("manta", pages, keyword, location, max_results, deadline)
 
-    if r:
-        soup = BeautifulSoup(r.text, "html.parser")
-        listings = soup.select("div.search-result-card")[:max_results]
-        for entry in listings:
-            name_tag = entry.select_one("a.search-result-title")
-            category_tag = entry.select_one("div.category")
-            location_tag = entry.select_one("div.location")
-            phone_tag = entry.select_one("div.phone")
-            website_tag = entry.select_one("a.website-link")
-
-            name = name_tag.get_text(strip=True) if name_tag else None
-            if not name or not fuzzy_unique(name):
-                continue
-            cat = category_tag.get_text(strip=True) if category_tag else ""
-            loc = location_tag.get_text(strip=True) if location_tag else location
-            phone = phone_tag.get_text(strip=True) if phone_tag else None
-            website = website_tag["href"] if website_tag else None
-
-            leads.append({
-                "name": name,
-                "industry": cat,
-                "location": loc,
-                "phone": phone,
-                "rating": None,
-                "snippet": None,
-                "website_url": website,
-                "year_founded": None,
-                "size": None,
-                "score": 0
-            })
-            time.sleep(0.3)
+SOURCES = {
+    "yellowpages": search_yellowpages,
+    "yelp": search_yelp,
+    "manta": search_manta
+}
 
+def _traced_search(source, keyword, location, max_results, deadline):
+    with span(f"scrape.{source}") as sp:
+        leads = SOURCES[source](keyword, location, max_results, deadline)
+        sp.set(rows=len(leads))
     return leads
+
+def iter_search_all(keyword, location, max_results=10, timeout=15.0, sources=None):
+    """
+    Start all scrapers concurrently under one global deadline (`timeout` seconds)
+    and return an iterator of (source, leads) pairs in completion order.
+    Scrapers stop fetching pages at the deadline and return what they parsed so far;
+    sources still running after the grace period are not yielded.
+    """
+    sources = sources or list(SOURCES)
+    deadline = time.monotonic() + timeout
+    executor = ThreadPoolExecutor(max_workers=len(sources))
+    # Each worker runs in a copy of the caller's context so its span joins the caller's trace
+    futures = {
+        executor.submit(contextvars.copy_context().run, _traced_search, src, keyword, location, max_results, deadline): src
+        for src in sources
+    }
+    executor.shutdown(wait=False)
+
+    def results():
+        try:
+            for future in as_completed(futures, timeout=timeout + DEADLINE_GRACE):
+                try:
+                    leads = future.result()
+                except:
+                    leads = []
+                yield futures[future], leads
+        except FuturesTimeout:
+            return
+
+    return results()
+
+def search_all(keyword, location, max_results=10, timeout=15.0, sources=None):
+    """
+    Run all scrapers concurrently and wait for them (see iter_search_all).
+    Returns {source: leads}; a source still running after the grace period contributes [].
+    """
+    sources = sources or list(SOURCES)
+    results = {src: [] for src in sources}
+    for src, leads in iter_search_all(keyword, location, max_results, timeout, sources):
+        results[src] = leads
+    return results
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import company_column, dataset_rows
+
+# Prebuilt index written by `python -m src.search_index build`
+INDEX_DIR = "data/index"
+INDEX_VERSION = 1
+FIELDS = ["name", "industry", "city", "state", "country_name"]
+NGRAM = 3
+# Above this share of the dataset's rows, a condition is answered faster by scanning
+SCAN_FRACTION = 0.1
+
+_PARTS = ["gram_keys", "gram_offsets", "gram_postings", "value_bytes", "value_offsets", "row_order", "row_offsets"]
+_cached_index = None
+
+def _grams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+class FieldIndex:
+    """
+    Trigram index over the distinct lowercased values of one column.
+
+    gram → sorted value ids (postings), value id → sorted row ids. A substring
+    query intersects the postings of its trigrams, confirms the surviving values
+    in one pyarrow match_substring call, then expands them to rows.
+    """
+
+    def __init__(self, parts):
+        self.parts = parts
+        keys = parts["gram_keys"]
+        self._gram_ids = {k: i for i, k in enumerate(keys.tolist())}
+        self._values = None
+
+    def values(self):
+        """The distinct values as an Arrow string array over the memory-mapped bytes (no copy)."""
+        if self._values is None:
+            import pyarrow as pa
+            offsets = self.parts["value_offsets"]
+            self._values = pa.LargeStringArray.from_buffers(
+                len(offsets) - 1, pa.py_buffer(offsets), pa.py_buffer(self.parts["value_bytes"])
+            )
+        return self._values
+
+    def value(self, vid):
+        return self.values()[int(vid)].as_py()
+
+    def _postings(self, gram):
+        gid = self._gram_ids.get(gram)
+        if gid is None:
+            return np.empty(0, dtype=np.int32)
+        offsets = self.parts["gram_offsets"]
+        return self.parts["gram_postings"][offsets[gid]:offsets[gid + 1]]
+
+    def matching_values(self, needle, limit=None):
+        """
+        Sorted ids of distinct values that contain `needle` (already lowercased,
+        at least NGRAM characters). None when more than `limit` values remain to
+        be confirmed, i.e. the needle is too common for the index to pay off.
+        """
+        lists = sorted((self._postings(g) for g in _grams(needle)), key=len)
+        candidates = lists[0]
+        if limit is not None and len(candidates) > limit:
+            return None
+        for postings in lists[1:]:
+            if not len(candidates):
+                break
+            # Both lists are sorted: keep the candidates found in `postings`
+            pos = np.minimum(np.searchsorted(postings, candidates), len(postings) - 1)
+            candidates = candidates[postings[pos] == candidates]
+        if not len(candidates):
+            return np.empty(0, dtype=np.int32)
+        import pyarrow.compute as pc
+        hits = pc.match_substring(self.values().take(candidates), needle).to_numpy(zero_copy_only=False)
+        return np.asarray(candidates[hits], dtype=np.int32)
+
+    def row_count(self, vids):
+        offsets = self.parts["row_offsets"]
+        return int((offsets[vids + 1] - offsets[vids]).sum())
+
+    def rows(self, vids):
+        """Row ids (unsorted) of the given value ids, gathered without a Python loop."""
+        order, offsets = self.parts["row_order"], self.parts["row_offsets"]
+        starts = offsets[vids]
+        lengths = offsets[vids + 1] - starts
+        if not len(vids) or not lengths.sum():
+            return np.empty(0, dtype=np.int64)
+        ends = np.cumsum(lengths)
+        positions = np.repeat(starts - (ends - lengths), lengths) + np.arange(ends[-1])
+        return order[positions].astype(np.int64)
+
+def _factorize(column):
+    """
+    (row codes, distinct values) of a column lowercased: a pandas Series, or an
+    Arrow ChunkedArray read one chunk at a time (dictionary chunks map only
+    their distinct values), so no pandas copy of the column is made.
+    """
+    if isinstance(column, pd.Series):
+        codes, uniques = pd.factorize(column.fillna("").astype(str).str.lower(), sort=False)
+        return codes.astype(np.int32), [str(v) for v in uniques]
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    lookup = {}
+    parts = []
+    for chunk in column.chunks:
+        if not pa.types.is_dictionary(chunk.type):
+            chunk = pc.dictionary_encode(chunk)
+        values = pc.utf8_lower(chunk.dictionary).to_pylist() + [""]  # the extra "" stands for nulls
+        ids = np.array([lookup.setdefault(v or "", len(lookup)) for v in values], dtype=np.int32)
+        indices = pc.fill_null(chunk.indices, len(values) - 1).to_numpy(zero_copy_only=False)
+        parts.append(ids[indices])
+    codes = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32)
+    return codes, list(lookup)
+
+def _build_field(column):
+    codes, values = _factorize(column)
+
+    gram_ids = {}
+    pair_gram, pair_value = array("i"), array("i")
+    for vid, value in enumerate(values):
+        for gram in _grams(value):
+            pair_gram.append(gram_ids.setdefault(gram, len(gram_ids)))
+            pair_value.append(vid)
+    pair_gram = np.frombuffer(pair_gram, dtype=np.int32)
+    pair_value = np.frombuffer(pair_value, dtype=np.int32)
+    order = np.lexsort((pair_value, pair_gram))
+
+    encoded = [v.encode("utf-8") for v in values]
+    return {
+        "gram_keys": np.array(list(gram_ids), dtype=f"U{NGRAM}"),
+        "gram_offsets": np.concatenate(([0], np.cumsum(np.bincount(pair_gram, minlength=len(gram_ids))))).astype(np.int64),
+        "gram_postings": pair_value[order],
+        "value_bytes": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "value_offsets": np.concatenate(([0], np.cumsum([len(b) for b in encoded]))).astype(np.int64),
+        "row_order": np.argsort(codes, kind="stable").astype(np.int32),
+        "row_offsets": np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(values))))).astype(np.int64),
+    }
+
+def build_index(df=None, index_dir=INDEX_DIR):
+    """
+    Build and persist the per-field trigram index for the loaded company dataset
+    (or `df`), one column at a time.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    for field in FIELDS:
+        column = df[field] if df is not None else company_column(field)
+        for part, arr in _build_field(column).items():
+            np.save(os.path.join(index_dir, f"{field}.{part}.npy"), arr)
+    rows = len(df) if df is not None else dataset_rows()
+    with open(os.path.join(index_dir, "meta.json"), "w") as f:
+        json.dump({"version": INDEX_VERSION, "rows": rows, "fields": FIELDS}, f)
+    return index_dir
+
+def load_index(index_dir=INDEX_DIR, expected_rows=None):
+    """
+    Load (and cache) the persisted index with memory-mapped arrays.
+    Returns None if no index has been built, or it is stale for `expected_rows`.
+    """
+    global _cached_index
+    if _cached_index is None:
+        try:
+            with open(os.path.join(index_dir, "meta.json"), "r") as f:
+                meta = json.load(f)
+        except:
+            return None
+        if meta.get("version") != INDEX_VERSION:
+            return None
+        fields = {
+            field: FieldIndex({
+                part: np.load(os.path.join(index_dir, f"{field}.{part}.npy"), mmap_mode="r")
+                for part in _PARTS
+            })
+            for field in meta["fields"]
+        }
+        _cached_index = (meta["rows"], fields)
+    rows, fields = _cached_index
+    if expected_rows is not None and rows != expected_rows:
+        return None
+    return fields
+
+def candidate_rows(index, kw_lower, loc_lower, cat_lower="", num_rows=None):
+    """
+    Sorted row ids satisfying the most selective of the query's conditions
+    (keyword in name/industry, location in city/state/country_name, category in
+    industry): a superset of the matches, which the caller confirms on just
+    these rows. None when every condition matches more than SCAN_FRACTION of
+    `num_rows` (or has a needle shorter than a trigram), as a scan is faster then.
+    """
+    budget = max(1, int((num_rows or 0) * SCAN_FRACTION))
+    groups = [[("name", kw_lower), ("industry", kw_lower)],
+              [("city", loc_lower), ("state", loc_lower), ("country_name", loc_lower)]]
+    if cat_lower:
+        groups.append([("industry", cat_lower)])
+    best = None
+    for group in groups:
+        matched, total = {}, 0
+        for field, needle in group:
+            vids = index[field].matching_values(needle, limit=budget) if len(needle) >= NGRAM else None
+            if vids is None:
+                break
+            matched[field] = vids
+            total += index[field].row_count(vids)
+            if total > budget:
+                break
+        else:
+            if best is None or total < best[0]:
+                best = (total, matched)
+    if best is None:
+        return None
+    parts = [index[field].rows(vids) for field, vids in best[1].items()]
+    return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Company search index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build the trigram index for the company dataset")
+    build.add_argument("--out", default=INDEX_DIR)
+    args = parser.parse_args()
+    if args.command == "build":
+        print(f"Wrote {build_index(index_dir=args.out)}")
@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.data_loader import COLUMNAR_PATH, arrow_mask, load_company_table
+from src.tracing import span
+
+SHARD_ROWS = 1_000_000  # rows per shard (a contiguous row range of the columnar file)
+# Worker processes for sharded scans; LEAD_SEARCH_WORKERS=1 disables sharding
+WORKERS = int(os.environ.get("LEAD_SEARCH_WORKERS", "0")) or os.cpu_count() or 1
+
+_pool_lock = threading.Lock()
+_pool = None
+_pool_path = None
+
+# Per-worker-process state: the memory-mapped table and the file identity it was opened from
+_worker_path = None
+_worker_table = None
+_worker_key = None
+
+def use_shards(num_rows):
+    """True when a scan of `num_rows` rows is worth splitting across processes."""
+    return WORKERS > 1 and num_rows > SHARD_ROWS
+
+def shard_ranges(num_rows, shard_rows=SHARD_ROWS):
+    """Contiguous (start, stop) row ranges covering 0..num_rows."""
+    return [(start, min(start + shard_rows, num_rows)) for start in range(0, num_rows, shard_rows)]
+
+def _init_worker(path):
+    global _worker_path
+    _worker_path = path
+
+def _shard_table():
+    """
+    The worker's memory-mapped table, reopened if the file changed since it was mapped.
+    Every worker maps the same file, so its pages are shared through the OS page cache.
+    """
+    global _worker_table, _worker_key
+    stat = os.stat(_worker_path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    if key != _worker_key:
+        import pyarrow as pa
+        _worker_table = pa.ipc.open_file(pa.memory_map(_worker_path, "r")).read_all()
+        _worker_key = key
+    return _worker_table
+
+def _scan_shard(start, stop, kw_lower, loc_lower, cat_lower, size_range, limit):
+    table = _shard_table().slice(start, stop - start)  # zero-copy view
+    rows = np.flatnonzero(arrow_mask(table, kw_lower, loc_lower, cat_lower, size_range)) + start
+    return rows if limit is None else rows[:limit]
+
+def get_pool(path=COLUMNAR_PATH):
+    """
+    Shared process pool for sharded scans of `path`, started on first use.
+    Workers are spawned (not forked) so they never inherit model or thread-pool state.
+    """
+    global _pool, _pool_path
+    path = os.path.abspath(path)
+    with _pool_lock:
+        if _pool is None or _pool_path != path:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(
+                max_workers=WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(path,)
+            )
+            _pool_path = path
+    return _pool
+
+def filter_rows_sharded(kw_lower, loc_lower, cat_lower="", size_range=None, limit=None, path=COLUMNAR_PATH):
+    """
+    Row ids matching filter_companies' conditions, scanned in parallel row-range
+    shards of the columnar file. Shard results are merged in shard order, so the
+    ids come back ascending exactly as a single-process scan returns them; with
+    `limit`, merging stops (and pending shards are cancelled) once enough rows
+    have been found.
+    """
+    num_rows = load_company_table(path).num_rows
+    ranges = shard_ranges(num_rows)
+    with span("filter.shards", shards=len(ranges), workers=WORKERS) as sp:
+        pool = get_pool(path)
+        futures = [
+            pool.submit(_scan_shard, start, stop, kw_lower, loc_lower, cat_lower, size_range, limit)
+            for start, stop in ranges
+        ]
+        parts = []
+        found = 0
+        try:
+            for future in futures:
+                rows = future.result()
+                parts.append(rows)
+                found += len(rows)
+                if limit is not None and found >= limit:
+                    break
+        finally:
+            for future in futures:
+                future.cancel()
+        sp.set(shards_merged=len(parts))
+    rows = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+    return rows if limit is None else rows[:limit]
@@ -0,0 +1,138 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+
+# Process-wide switch: LEAD_TRACE=1 (or set_enabled(True)). Spans are also recorded in any
+# context that has started a trace; everywhere else span() returns a shared no-op
+ENABLED = os.environ.get("LEAD_TRACE", "") not in ("", "0", "false")
+LOG_JSON = os.environ.get("LEAD_TRACE_LOG", "") not in ("", "0", "false")
+
+logger = logging.getLogger("lead_scraper.trace")
+
+_current_trace = contextvars.ContextVar("lead_trace", default=None)
+_current_span = contextvars.ContextVar("lead_span", default=None)
+
+# Process-wide aggregates for Prometheus-style export: name -> [count, total seconds]
+_metrics_lock = threading.Lock()
+_metrics = {}
+
+def set_enabled(enabled):
+    global ENABLED
+    ENABLED = bool(enabled)
+
+class Trace:
+    """Finished spans of one pipeline run, in completion order."""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_records(self):
+        return [span.to_record() for span in sorted(self.spans, key=lambda s: s.start)]
+
+class Span:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        parent = _current_span.get()
+        self.parent = parent.name if parent else None
+        self.depth = parent.depth + 1 if parent else 0
+        self.start = 0.0
+        self.seconds = 0.0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(self)
+        with _metrics_lock:
+            entry = _metrics.setdefault(self.name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += self.seconds
+        if LOG_JSON:
+            logger.info(json.dumps(self.to_record(), default=str))
+        return False
+
+    def to_record(self):
+        return {
+            "span": self.name,
+            "parent": self.parent,
+            "depth": self.depth,
+            "ms": round(self.seconds * 1000, 2),
+            **self.attrs
+        }
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP = _NoopSpan()
+
+def span(name, **attrs):
+    """
+    Context manager timing one pipeline stage; `attrs` (row counts, cache hits,
+    model calls…) can be added up front or later with .set().
+    """
+    if not ENABLED and _current_trace.get() is None:
+        return _NOOP
+    return Span(name, attrs)
+
+def start_trace():
+    """
+    Begin collecting spans for the current context, whatever ENABLED says;
+    returns the Trace.
+    """
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+def clear_trace():
+    """Stop collecting spans for the current context (started by start_trace)."""
+    _current_trace.set(None)
+
+def prometheus_text():
+    """Aggregated span counts and durations in Prometheus text exposition format."""
+    with _metrics_lock:
+        items = sorted(_metrics.items())
+    lines = [
+        "# TYPE lead_stage_seconds summary",
+    ]
+    for name, (count, total) in items:
+        lines.append(f'lead_stage_seconds_count{{stage="{name}"}} {count}')
+        lines.append(f'lead_stage_seconds_sum{{stage="{name}"}} {total:.6f}')
+    return "\n".join(lines) + "\n"
+
+def cache_delta(cache, before):
+    """Hit/miss counts of a VectorCache since the `before` stats() snapshot."""
+    after = cache.stats()
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    return {
+        "cache_hits": hits,
+        "cache_misses": misses,
+        "cache_hit_rate": round(hits / (hits + misses), 3) if hits + misses else None
+    }
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+CACHE_DIR = "data/cache"
+SQL_CHUNK = 500  # keys per IN (...) lookup, under SQLite's variable limit
+
+def cache_key(text, model_name):
+    """
+    Hash of the exact model input text plus the model name.
+    """
+    return hashlib.sha1(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+class VectorCache:
+    """
+    On-disk, size-bounded LRU cache of float32 vectors keyed by model input text.
+
+    Vectors live in a memory-mapped (capacity x dim) float32 matrix; a SQLite
+    index maps each key to its row slot and records when it was last used.
+    Every lookup and write runs in an IMMEDIATE transaction, so processes
+    sharing the cache directory (the app and a batch run, say) never see a slot
+    that another process is reassigning.
+    """
+
+    def __init__(self, name, model_name, dim, capacity=50_000, cache_dir=CACHE_DIR):
+        self.model_name = model_name
+        self.dim = dim
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._data_path = os.path.join(cache_dir, f"{name}.f32")
+        self._legacy_index_path = os.path.join(cache_dir, f"{name}.index.json")
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, f"{name}.index.sqlite"), timeout=60,
+            check_same_thread=False, isolation_level=None  # transactions are explicit
+        )
+        with self._transaction():
+            self._conn.execute("CREATE TABLE IF NOT EXISTS slots (key TEXT PRIMARY KEY, slot INTEGER, used REAL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS slots_used ON slots (used)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'shape'").fetchone()
+            shape = json.dumps([capacity, dim])
+            expected_size = capacity * dim * np.dtype(np.float32).itemsize
+            if row is None or row[0] != shape or not os.path.exists(self._data_path) \
+                    or os.path.getsize(self._data_path) != expected_size:
+                self._conn.execute("DELETE FROM slots")
+                self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('shape', ?)", (shape,))
+                np.memmap(self._data_path, dtype=np.float32, mode="w+", shape=(capacity, dim)).flush()
+                if os.path.exists(self._legacy_index_path):
+                    os.remove(self._legacy_index_path)  # slot map of the old JSON-indexed format
+        self._matrix = np.memmap(self._data_path, dtype=np.float32, mode="r+", shape=(capacity, dim))
+
+    @contextmanager
+    def _transaction(self):
+        """Thread lock plus an IMMEDIATE transaction (SQLite's cross-process write lock)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _lookup(self, keys):
+        slots = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), SQL_CHUNK):
+            chunk = unique[start:start + SQL_CHUNK]
+            slots.update(self._conn.execute(
+                f"SELECT key, slot FROM slots WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+            ))
+        return slots
+
+    def get_or_compute(self, texts, compute_fn):
+        """
+        Return an (n, dim) float32 array for `texts`, calling `compute_fn` once
+        with the list of texts that are not cached yet.
+        """
+        texts = list(texts)
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        keys = [cache_key(t, self.model_name) for t in texts]
+        missing = []
+        with self._transaction():
+            slots = self._lookup(keys)
+            for i, key in enumerate(keys):
+                slot = slots.get(key)
+                if slot is None:
+                    missing.append(i)
+                else:
+                    out[i] = self._matrix[slot]
+            if slots:
+                now = time.time()
+                self._conn.executemany("UPDATE slots SET used = ? WHERE key = ?", [(now, key) for key in slots])
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        if not missing:
+            return out
+
+        # Compute each distinct missing text once
+        unique = list(OrderedDict.fromkeys(texts[i] for i in missing))
+        vecs = np.asarray(compute_fn(unique), dtype=np.float32).reshape(len(unique), self.dim)
+        by_text = dict(zip(unique, vecs))
+        for i in missing:
+            out[i] = by_text[texts[i]]
+        self._put_many({cache_key(text, self.model_name): vec for text, vec in by_text.items()})
+        return out
+
+    def _put_many(self, vectors):
+        """Store {key: vector}, evicting least recently used entries when full."""
+        vectors = dict(list(vectors.items())[-self.capacity:])
+        with self._transaction():
+            # Another process may have stored some of these keys meanwhile: reuse their slots
+            slots = self._lookup(list(vectors))
+            new_keys = [key for key in vectors if key not in slots]
+            count = self._conn.execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+            # Slots are handed out densely (0..count-1), so the next free one is `count`
+            free = list(range(count, min(count + len(new_keys), self.capacity)))
+            evict = len(new_keys) - len(free)
+            if evict > 0:
+                victims = self._conn.execute(
+                    "SELECT key, slot FROM slots ORDER BY used LIMIT ?", (evict + len(slots),)
+                ).fetchall()
+                victims = [(key, slot) for key, slot in victims if key not in vectors][:evict]
+                self._conn.executemany("DELETE FROM slots WHERE key = ?", [(key,) for key, _ in victims])
+                free += [slot for _, slot in victims]
+            slots.update(zip(new_keys, free))
+            now = time.time()
+            for key, slot in slots.items():
+                self._matrix[slot] = vectors[key]
+            self._matrix.flush()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO slots (key, slot, used) VALUES (?, ?, ?)",
+                [(key, slot, now) for key, slot in slots.items()]
+            )
+
+    def stats(self):
+        total = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+        return {
+            "entries": entries,
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def clear(self):
+        with self._transaction():
+            self._conn.execute("DELETE FROM slots")
+            self.hits = self.misses = 0
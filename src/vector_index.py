@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from src.data_loader import company_batches, company_rows, dataset_rows
+from src.models import encode_texts
+
+# Offline FAISS index written by `python -m src.vector_index build`
+VECTOR_INDEX_PATH = "data/index/companies.faiss"
+EMBED_CHUNK = 50_000
+TRAIN_SAMPLE = 200_000
+MIN_TRAIN_PER_LIST = 39  # FAISS's minimum training points per IVF centroid
+
+_cached_index = None
+
+def company_text(name, industry, city, state, country_name):
+    """
+    Text embedded for each company: name + industry + location.
+    """
+    location = ", ".join(filter(None, [city, state, country_name]))
+    return f"{name} {industry} {location}"
+
+def _embed(texts):
+    return np.asarray(encode_texts(texts), dtype=np.float32)
+
+def build_vector_index(df=None, out_path=VECTOR_INDEX_PATH, nlist=None, pq_m=None, hnsw=False):
+    """
+    Embed every company and write a persisted FAISS inner-product index.
+    Uses IVF (nlist ≈ 4·√rows, capped so each centroid gets MIN_TRAIN_PER_LIST
+    training points) with flat storage, or PQ-compressed codes when
+    `pq_m` sub-quantizers are given; `hnsw=True` builds an HNSW graph instead.
+    """
+    import faiss
+
+    cols = ["name", "industry", "city", "state", "country_name"]
+    if df is None:
+        # Read the dataset a batch at a time rather than as one pandas frame
+        n = dataset_rows()
+        batches = company_batches(cols, EMBED_CHUNK)
+    else:
+        n = len(df)
+        batches = (df.iloc[start:start + EMBED_CHUNK][cols] for start in range(0, n, EMBED_CHUNK))
+
+    def frame_vectors(part):
+        return _embed([company_text(*row) for row in part[cols].astype(str).values.tolist()])
+
+    first = frame_vectors(next(batches))
+    dim = first.shape[1]
+    if hnsw:
+        index = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+    else:
+        # Train on an evenly spaced sample of rows
+        sample_rows = np.linspace(0, n - 1, min(n, TRAIN_SAMPLE)).astype(int)
+        nlist = nlist or max(1, min(int(4 * np.sqrt(n)), len(sample_rows) // MIN_TRAIN_PER_LIST))
+        quantizer = faiss.IndexFlatIP(dim)
+        if pq_m:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, 8, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(frame_vectors(df.iloc[sample_rows] if df is not None else company_rows(sample_rows)))
+
+    index.add(first)
+    for part in batches:
+        index.add(frame_vectors(part))
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    faiss.write_index(index, out_path)
+    with open(out_path + ".json", "w") as f:
+        json.dump({"rows": n, "dim": dim, "kind": type(index).__name__}, f)
+    return out_path
+
+def load_vector_index(path=VECTOR_INDEX_PATH):
+    """
+    Load (and cache) the FAISS index, memory-mapped where the index type allows.
+    Returns None when no index has been built or it was built for a different dataset.
+    """
+    global _cached_index
+    if _cached_index is None:
+        try:
+            with open(path + ".json", "r") as f:
+                meta = json.load(f)
+        except:
+            return None
+        if meta.get("rows") != dataset_rows():
+            return None
+        import faiss
+        try:
+            _cached_index = faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except:
+            _cached_index = faiss.read_index(path)
+    return _cached_index
+
+def search_similar(query, k=100, nprobe=16):
+    """
+    Top-k dataset rows nearest to `query` (a text string or a normalized vector).
+    Returns (row_ids, cosine_similarities), or None without a built index.
+    """
+    index = load_vector_index()
+    if index is None:
+        return None
+    if isinstance(query, str):
+        vec = _embed([query])
+    else:
+        vec = np.asarray(query, dtype=np.float32).reshape(1, -1)
+    if hasattr(index, "nprobe"):
+        index.nprobe = nprobe
+    sims, rows = index.search(vec, k)
+    keep = rows[0] >= 0
+    return rows[0][keep], sims[0][keep]
+
+def semantic_companies(keyword, loc_lower, cat_lower="", size_range=None, k=200):
+    """
+    Companies semantically close to `keyword` that also pass the location filter
+    (and category / size-range filters, if given). None without a built index.
+    """
+    hits = search_similar(keyword, k=k)
+    if hits is None:
+        return None
+    rows, _ = hits
+    df = company_rows(np.sort(rows))
+
+    def contains(col, needle):
+        return df[col].astype(str).str.lower().str.contains(needle, regex=False)
+
+    mask = contains("city", loc_lower) | contains("state", loc_lower) | contains("country_name", loc_lower)
+    if cat_lower:
+        mask &= contains("industry", cat_lower)
+    if size_range:
+        mask &= df["size_mid"].between(*size_range)
+    return df[mask]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FAISS vector index over the company dataset")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Embed all companies and write the index")
+    build.add_argument("--out", default=VECTOR_INDEX_PATH)
+    build.add_argument("--nlist", type=int, default=None)
+    build.add_argument("--pq-m", type=int, default=None, help="PQ sub-quantizers (compressed codes)")
+    build.add_argument("--hnsw", action="store_true", help="Build an HNSW graph instead of IVF")
+    query = sub.add_parser("query", help="Print the nearest companies to a text query")
+    query.add_argument("text")
+    query.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+    if args.command == "build":
+        print(f"Wrote {build_vector_index(out_path=args.out, nlist=args.nlist, pq_m=args.pq_m, hnsw=args.hnsw)}")
+    elif args.command == "query":
+        hits = search_similar(args.text, k=args.k)
+        if hits is None:
+            parser.exit(1, "No vector index built; run `python -m src.vector_index build` first.\n")
+        rows, sims = hits
+        for (_, row), sim in zip(company_rows(rows).iterrows(), sims):
+            print(f"{sim:.3f}  {row['name']} | {row['industry']} | {row['city']}, {row['country_name']}")
@@ -0,0 +1,67 @@
+import os
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+# src/ is imported as a namespace package from the repository root, as app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import write_company_csv  # noqa: E402
+
+@pytest.fixture
+def dataset_dir(tmp_path, monkeypatch):
+    """
+    Temporary working directory holding a synthetic Kaggle CSV under data/
+    (the relative paths the modules use), with the in-process dataset caches reset.
+    """
+    from src import data_loader, search_index
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    write_company_csv(data_loader.CSV_PATH, 3000)
+    monkeypatch.setattr(data_loader, "_cached_df", None)
+    monkeypatch.setattr(data_loader, "_cached_table", None)
+    monkeypatch.setattr(search_index, "_cached_index", None)
+    return tmp_path
+
+EMBED_DIM = 384  # src.evaluation.EMBED_DIM
+
+def fake_sentiment(texts):
+    return [zlib.crc32(text.encode()) % 1000 / 1000 for text in texts]
+
+def fake_embeddings(texts):
+    """Unit vectors leaning towards one axis, so similarities spread around the 0.6 cut-off."""
+    vecs = []
+    for text in texts:
+        rng = np.random.default_rng(zlib.crc32(text.encode()))
+        vec = np.concatenate([[1.0], rng.uniform(-1, 1, EMBED_DIM - 1) * 0.07])
+        vecs.append(vec / np.linalg.norm(vec))
+    return np.asarray(vecs, dtype=np.float32)
+
+@pytest.fixture
+def stub_models(monkeypatch, tmp_path):
+    """Counts the texts each stubbed model sees; the caches (only read for stats) live in tmp_path."""
+    from src import evaluation, llm
+    from src.llm import sentiment_text
+    from src.vector_cache import VectorCache
+
+    seen = {"sentiment": 0, "embed": 0}
+
+    def sentiment_scores(texts):
+        seen["sentiment"] += len(texts)
+        return fake_sentiment(texts)
+
+    def embed_texts(texts):
+        seen["embed"] += len(texts)
+        return fake_embeddings(texts)
+
+    monkeypatch.setattr(evaluation, "sentiment_scores", sentiment_scores)
+    monkeypatch.setattr(evaluation, "sentiment_score", lambda lead: fake_sentiment([sentiment_text(lead)])[0])
+    monkeypatch.setattr(evaluation, "embed_texts", embed_texts)
+    monkeypatch.setattr(evaluation, "_ideal_vec", None)
+    cache_dir = str(tmp_path / "cache")
+    monkeypatch.setattr(llm, "_sentiment_cache", VectorCache("sentiment", "stub", 1, 16, cache_dir))
+    monkeypatch.setattr(evaluation, "_embedding_cache", VectorCache("embeddings", "stub", 4, 16, cache_dir))
+    return seen
@@ -0,0 +1,59 @@
+import glob
+
+import numpy as np
+import pandas as pd
+
+from src import data_loader, search_index
+
+QUERIES = [("summit eagle", "denver", ""), ("golden", "toronto", "bakery"), ("zzz", "texas", "")]
+
+def reset_caches(monkeypatch):
+    monkeypatch.setattr(data_loader, "_cached_df", None)
+    monkeypatch.setattr(data_loader, "_cached_table", None)
+    monkeypatch.setattr(search_index, "_cached_index", None)
+
+def test_index_built_from_arrow_matches_frame(dataset_dir, monkeypatch):
+    data_loader.convert_to_columnar()
+    search_index.build_index(index_dir="data/index_arrow")
+    frame = data_loader.load_company_table().to_pandas()
+    search_index.build_index(frame, index_dir="data/index_frame")
+    reset_caches(monkeypatch)
+    arrow_index = search_index.load_index("data/index_arrow")
+    reset_caches(monkeypatch)
+    frame_index = search_index.load_index("data/index_frame")
+    for kw, loc, cat in QUERIES:
+        assert np.array_equal(
+            search_index.candidate_rows(arrow_index, kw, loc, cat, 3000),
+            search_index.candidate_rows(frame_index, kw, loc, cat, 3000)
+        )
+
+def test_company_batches_cover_table(dataset_dir):
+    data_loader.convert_to_columnar()
+    columns = ["name", "city"]
+    batches = list(data_loader.company_batches(columns, 1000))
+    assert len(batches) == 3
+    expected = data_loader.load_company_table().select(columns).to_pandas()
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), expected)
+
+def test_snapshot_round_trip(dataset_dir, monkeypatch):
+    from_csv = data_loader.load_company_data()
+    csv_matches = [data_loader.filter_companies(kw, loc, cat) for kw, loc, cat in QUERIES]
+    assert glob.glob("data/cache/companies-*.feather")
+    reset_caches(monkeypatch)
+    from_snapshot = data_loader.load_company_data()
+    pd.testing.assert_frame_equal(from_snapshot, from_csv)
+    for (kw, loc, cat), expected in zip(QUERIES, csv_matches):
+        pd.testing.assert_frame_equal(data_loader.filter_companies(kw, loc, cat), expected)
+
+def test_convert_header_only_csv(dataset_dir):
+    import pyarrow as pa
+
+    data_loader.convert_to_columnar(out_path="data/full.arrow")
+    with open(data_loader.CSV_PATH) as f:
+        header = f.readline()
+    with open("data/empty.csv", "w") as f:
+        f.write(header)
+    data_loader.convert_to_columnar("data/empty.csv", "data/empty.arrow")
+    empty = pa.ipc.open_file("data/empty.arrow").read_all()
+    assert empty.num_rows == 0
+    assert empty.schema == pa.ipc.open_file("data/full.arrow").schema
@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.dedup import MAX_BLOCK_SIZE, dedup_leads
+from src.lead import Lead
+
+def names(batch):
+    return list(batch.name)
+
+def test_same_phone_is_one_business():
+    leads = [
+        Lead("Sunrise Cafe", location="Austin, TX", phone="(512) 555-0101"),
+        Lead("Sunrise Coffee House", location="Round Rock, TX", phone="+1 512-555-0101"),
+        Lead("Moonlight Diner", location="Austin, TX", phone="512-555-0199"),
+    ]
+    assert names(dedup_leads(leads)) == ["Sunrise Cafe", "Moonlight Diner"]
+
+def test_fuzzy_names_merge_only_with_overlapping_location():
+    same_city = [Lead("Summit Bakery, Inc.", location="Austin, TX"), Lead("summit bakery", location="Austin, Texas")]
+    assert names(dedup_leads(same_city)) == ["Summit Bakery, Inc."]
+    other_city = [Lead("Summit Bakery, Inc.", location="Austin, TX"), Lead("Summit Bakery", location="Denver, CO")]
+    assert names(dedup_leads(other_city)) == ["Summit Bakery, Inc.", "Summit Bakery"]
+    unknown = [Lead("Summit Bakery", location="Austin, TX"), Lead("Summit Bakeryy", location=None)]
+    assert names(dedup_leads(unknown)) == ["Summit Bakery"]
+    different = [Lead("Summit Bakery", location="Austin, TX"), Lead("Summit Brewing", location="Austin, TX")]
+    assert len(dedup_leads(different)) == 2
+
+def test_tokens_shared_by_too_many_leads_are_not_blocked_on():
+    # Identical one-token names only meet in the "bakery" block, which is too big to compare
+    leads = [Lead("Bakery", location="Austin, TX") for _ in range(MAX_BLOCK_SIZE + 1)]
+    assert len(dedup_leads(leads)) == MAX_BLOCK_SIZE + 1
+    # A rarer shared key (here a phone number) still brings a pair together
+    leads[5].phone = leads[9].phone = "512-555-0123"
+    assert len(dedup_leads(leads)) == MAX_BLOCK_SIZE
+
+def test_kept_lead_takes_missing_fields_from_duplicates():
+    leads = [
+        Lead("Golden Cafe", location="Toronto, ON", rating=4.0, score=70.0),
+        Lead("Golden Cafe Ltd", location="Toronto, Ontario", phone="416-555-0100", rating=2.5,
+             year_founded=1999, size=12, snippet="Great pastries", score=40.0),
+        Lead("Golden Cafe", location="Toronto", website_url="https://golden.example"),
+    ]
+    result = dedup_leads(leads)
+    assert len(result) == 1
+    kept = result[0]
+    assert (kept.name, kept.rating) == ("Golden Cafe", 4.0)  # first lead's own values win
+    assert (kept.phone, kept.year_founded, kept.size) == ("416-555-0100", 1999, 12)
+    assert (kept.snippet, kept.website_url) == ("Great pastries", "https://golden.example")
+    assert np.isnan(result.score[0])  # filled fields make the old score stale
+
+def test_unmerged_leads_keep_their_scores():
+    leads = [Lead("Alpha Plumbing", location="Austin, TX", score=55.0),
+             Lead("Beta Roofing", location="Austin, TX", score=60.0)]
+    assert dedup_leads(leads).score.tolist() == [55.0, 60.0]
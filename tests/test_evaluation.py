@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_leads
+from conftest import fake_embeddings, fake_sentiment
+from src import evaluation, llm
+from src.lead import LeadBatch
+from src.llm import sentiment_text
+
+PREFERRED_RANGES = [None, (1, 50), (201, 1000)]
+
+def test_import_opens_no_caches(tmp_path):
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", "import src.evaluation, src.llm"], cwd=tmp_path, check=True,
+                   env={**os.environ, "PYTHONPATH": repo})
+    assert not os.path.exists(tmp_path / "data")
+
+def test_caches_are_keyed_by_backend(monkeypatch, tmp_path):
+    from src.models import BACKEND
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(llm, "_sentiment_cache", None)
+    monkeypatch.setattr(evaluation, "_embedding_cache", None)
+    assert evaluation.get_embedding_cache().model_name.endswith(f"|{BACKEND}")
+    assert llm.get_sentiment_cache().model_name.endswith(f"|{BACKEND}")
+
+def per_row_scores(leads, preferred_range):
+    return [evaluation.score_company_row(lead, lead["industry"] or "", preferred_range) for lead in leads]
+
+@pytest.mark.parametrize("preferred_range", PREFERRED_RANGES)
+def test_score_batch_matches_per_row(stub_models, preferred_range):
+    leads = make_leads(300)
+    batch = LeadBatch.from_leads(leads)
+    keywords = [industry or "" for industry in batch.industry]
+    scores = evaluation.score_batch(batch, keywords, preferred_range)
+    assert scores.tolist() == per_row_scores(leads, preferred_range)
+
+def baseline_score(row, keyword_lower, preferred_range):
+    """The original per-row scoring (float32 dot, Python float arithmetic), with the stubbed models."""
+    weights = evaluation.WEIGHTS
+    founded, size_val, rating = row["year_founded"], row["size"], row["rating"]
+    total = min((evaluation.CURRENT_YEAR - founded) / 20.0, 1.0) * weights["age"] if founded else 0.0
+    if size_val is None:
+        size_score = 0.0
+    elif not preferred_range:
+        size_score = weights["size"] * 0.5
+    else:
+        low, high = preferred_range
+        if low <= size_val <= high:
+            size_score = float(weights["size"])
+        elif (size_val < low and (low - size_val) <= (0.5 * low)) or \
+                (size_val > high and (size_val - high) <= (0.5 * high)):
+            size_score = weights["size"] * 0.5
+        else:
+            size_score = 0.0
+    total += size_score
+    total += float(weights["industry"]) if row["industry"] and keyword_lower in row["industry"].lower() else 0.0
+    total += fake_sentiment([sentiment_text(row)])[0] * weights["sentiment"]
+    total += min(rating / 5.0, 1.0) * weights["rating"] if rating is not None and rating >= 0 else 0.0
+    ideal = fake_embeddings([evaluation.IDEAL_PROFILE])[0]
+    sim = float(np.dot(fake_embeddings([evaluation.semantic_text(row)])[0], ideal))
+    total += max((sim - 0.6) / (1 - 0.6), 0.0) * weights["semantic"]
+    return round(total, 2)
+
+@pytest.mark.parametrize("preferred_range", PREFERRED_RANGES)
+def test_score_batch_matches_baseline(stub_models, preferred_range):
+    leads = make_leads(1000, seed=3)
+    batch = LeadBatch.from_leads(leads)
+    keywords = [industry or "" for industry in batch.industry]
+    expected = [baseline_score(lead, lead["industry"] or "", preferred_range) for lead in leads]
+    assert evaluation.score_batch(batch, keywords, preferred_range).tolist() == expected
+
+@pytest.mark.parametrize("preferred_range", PREFERRED_RANGES)
+def test_score_leads_ranks_like_per_row(stub_models, preferred_range):
+    leads = make_leads(300, seed=1)
+    expected = sorted(zip(per_row_scores(leads, preferred_range), range(len(leads))), key=lambda x: -x[0])
+    ranked = evaluation.score_leads(leads, preferred_range)
+    assert ranked.score.tolist() == [score for score, _ in expected]
+    assert list(ranked.name) == [leads[i]["name"] for _, i in expected]
+
+@pytest.mark.parametrize("k", [1, 10, 50, 400])
+def test_top_k_matches_full_ranking(stub_models, k):
+    leads = make_leads(300, seed=2)
+    full = evaluation.score_leads(leads, (1, 50))
+    embedded = stub_models["embed"]
+    top = evaluation.score_leads(leads, (1, 50), top_k=k)
+    assert top.score.tolist() == full.score.tolist()[:k]
+    assert list(top.name) == list(full.name)[:k]
+    if k < 50:
+        assert stub_models["embed"] - embedded < len(leads)  # pruned leads never reach the models
@@ -0,0 +1,53 @@
+import csv
+import gzip
+import io
+import json
+import os
+
+import pyarrow.parquet as pq
+import pytest
+
+from src.export import COMPRESSIONS, FORMATS, exported_file
+from src.lead import Lead
+
+LEADS = [
+    Lead("Summit Bakery", "Bakery", "Austin, TX", "555-0100", 4.5, "Fresh bread", "https://summit.example",
+         1999, 40, 81.234),
+    Lead("Eagle Bakes", location="Denver, CO", score=12.5),
+    Lead("Golden Café", "Café", "Toronto, ON", year_founded=2011, size=7, score=55.0),
+]
+
+def served_bytes(out):
+    """What st.download_button reads from the object the app passes it."""
+    st_data = pytest.importorskip("streamlit.runtime.download_data_util")
+    data, _ = st_data.convert_data_to_bytes_and_infer_mime(out, unsupported_error=TypeError(type(out)))
+    return data
+
+def decompress(data, compression):
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)).read()
+    return data
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+@pytest.mark.parametrize("fmt", list(FORMATS))
+def test_exported_file_is_served_whole(fmt, compression):
+    with exported_file(LEADS, fmt, compression, chunk_size=2) as (out, rows):
+        path = out.name
+        data = served_bytes(out)
+    assert rows == len(LEADS)
+    assert not os.path.exists(path)
+
+    if fmt == "parquet":
+        records = pq.read_table(io.BytesIO(data)).to_pylist()
+    else:
+        text = decompress(data, compression).decode("utf-8")
+        if fmt == "csv":
+            records = list(csv.DictReader(io.StringIO(text)))
+        else:
+            records = [json.loads(line) for line in text.splitlines()]
+    assert [r["name"] for r in records] == [lead.name for lead in LEADS]
+    assert round(float(records[0]["score"]), 2) == 81.23
+    assert records[1]["year_founded"] in (None, "")
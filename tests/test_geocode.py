@@ -0,0 +1,21 @@
+import pytest
+
+from src.geocode import normalize_address
+
+@pytest.mark.parametrize("a, b", [
+    ("Austin, TX", "austin texas"),
+    ("Austin, TX", "AUSTIN,  Texas"),
+    ("Austin, TX 78701", "austin texas 78701"),
+    ("Seattle, WA, USA", "seattle, washington, united states"),
+])
+def test_equivalent_addresses_share_a_key(a, b):
+    assert normalize_address(a) == normalize_address(b)
+
+@pytest.mark.parametrize("address, key", [
+    ("Toronto, ON, CA", "toronto on ca"),
+    ("Acme Co", "acme co"),
+    ("London, UK", "london united kingdom"),
+    ("", ""),
+])
+def test_only_standalone_codes_expand(address, key):
+    assert normalize_address(address) == key
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_leads
+from src import evaluation, lead_store
+from src.evaluation import order_by_score, score_leads
+from src.lead_store import LeadStore
+from src.pipeline import score_stored, unscored
+
+QUERY = ("bakery", "austin", "", None)
+
+@pytest.fixture
+def store(stub_models, tmp_path, monkeypatch):
+    store = LeadStore(str(tmp_path / "leads.sqlite"))
+    monkeypatch.setattr(lead_store, "_store", store)
+    monkeypatch.setattr(lead_store, "STORE_ENABLED", True)
+    return store
+
+def by_name(batch):
+    return dict(zip(batch.name, batch.score.tolist()))
+
+def test_unchanged_leads_reuse_stored_scores(store, stub_models):
+    leads = make_leads(60)
+    first = unscored(leads)
+    score_stored(first, (1, 50))
+    seen = dict(stub_models)
+    second = unscored(leads)
+    score_stored(second, (1, 50))
+    assert stub_models == seen  # no model call
+    assert second.score.tolist() == first.score.tolist()
+    # size is the one query-dependent component: another range reuses the rest
+    other = unscored(leads)
+    score_stored(other, (201, 1000))
+    assert stub_models == seen
+    assert by_name(other) == by_name(score_leads(leads, (201, 1000)))
+
+def test_changed_lead_is_rescored(store, stub_models):
+    leads = make_leads(60)
+    score_stored(unscored(leads), None)
+    changed = [dict(lead) for lead in leads]
+    changed[7]["snippet"] = "Terrible service, never again"
+    changed[7]["rating"] = 1.0
+    seen = dict(stub_models)
+    batch = unscored(changed)
+    score_stored(batch, None)
+    assert stub_models["sentiment"] - seen["sentiment"] == 1
+    assert stub_models["embed"] - seen["embed"] == 1
+    assert by_name(batch) == by_name(score_leads(changed, None))
+
+def test_reweighted_totals_match_fresh_scoring(store, tmp_path, monkeypatch):
+    leads = make_leads(60)
+    batch = unscored(leads)
+    score_stored(batch, (1, 50))
+    store.record_query(QUERY, order_by_score(batch))
+    weights = {**evaluation.WEIGHTS, "age": 30, "semantic": 10}
+    reweighted = LeadStore(str(tmp_path / "leads.sqlite"), weights=weights)
+    stored = reweighted.top_k(QUERY, (1, 50))
+    monkeypatch.setattr(evaluation, "WEIGHTS", weights)
+    fresh = score_leads(leads, (1, 50))
+    assert by_name(stored) == by_name(fresh)
+    assert np.all(np.diff(stored.score) <= 0)
+
+def test_top_k_needs_a_wide_enough_ranking(store):
+    batch = unscored(make_leads(30))
+    score_stored(batch, None, top_k=10)
+    store.record_query(QUERY, order_by_score(batch).take(np.arange(10)), top_k=10)
+    assert len(store.top_k(QUERY, None, k=5)) == 5
+    assert store.top_k(QUERY, None, k=20) is None
+    assert store.top_k(QUERY, None, k=5, max_age=-1) is None
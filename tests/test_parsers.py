@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from src import parsers
+from src.scraper import PAGE_SPECS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks", "fixtures")
+
+def installed_backends():
+    names = []
+    for name in parsers.BACKENDS:
+        try:
+            parsers.get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+def parse_fixture(source, backend):
+    with open(os.path.join(FIXTURES_DIR, f"{source}.html"), encoding="utf-8") as f:
+        html = f.read()
+    query = {"keyword": "bakery", "location": "Austin, TX"}
+    return list(PAGE_SPECS[source].iter_entries(html, query, parsers.get_backend(backend)))
+
+@pytest.mark.parametrize("backend", installed_backends())
+@pytest.mark.parametrize("source", sorted(PAGE_SPECS))
+def test_backends_agree_with_bs4(source, backend):
+    expected = parse_fixture(source, "bs4")
+    assert expected
+    assert parse_fixture(source, backend) == expected
@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+
+from src import pipeline, result_cache
+from src.result_cache import ResultCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache.time, "monotonic", clock)
+    return clock
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(ttl=60, max_weight=100)
+    assert cache.get_or_compute("q", lambda: [1, 2]) == [1, 2]
+    clock.now += 59
+    assert cache.get_or_compute("q", lambda: 1 / 0) == [1, 2]
+    clock.now += 2
+    assert cache.lookup("q")[0] == "own"
+    assert cache.stats()["weight"] == 0
+
+def test_least_recently_used_entries_are_evicted_by_weight(clock):
+    cache = ResultCache(ttl=60, max_weight=5)
+    cache.get_or_compute("a", lambda: [1, 2])
+    cache.get_or_compute("b", lambda: [1, 2])
+    cache.get_or_compute("a", lambda: 1 / 0)  # "a" is now the most recently used
+    cache.get_or_compute("c", lambda: [1, 2])
+    assert cache.lookup("b")[0] == "own"
+    assert cache.lookup("a")[0] == "hit" and cache.lookup("c")[0] == "hit"
+    assert cache.stats()["weight"] == 4
+    cache.get_or_compute("huge", lambda: list(range(6)))  # heavier than the whole cache: not stored
+    assert cache.lookup("huge")[0] == "own"
+    assert cache.stats()["weight"] == 4
+
+def run_waiters(cache, key, count):
+    """Start `count` threads that look up `key` while it is in flight; returns their outcomes."""
+    outcomes = []
+
+    def wait():
+        status, future = cache.lookup(key)
+        try:
+            outcomes.append((status, future.result(timeout=5)))
+        except Exception as e:
+            outcomes.append((status, e))
+
+    threads = [threading.Thread(target=wait) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+def test_concurrent_callers_share_one_computation():
+    cache = ResultCache(ttl=60, max_weight=100)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["lead"]
+
+    owner = threading.Thread(target=cache.get_or_compute, args=("q", compute))
+    owner.start()
+    started.wait(5)
+    threads, outcomes = run_waiters(cache, "q", 3)
+    release.set()
+    for thread in [owner, *threads]:
+        thread.join(5)
+    assert calls == [1]
+    assert outcomes == [("wait", ["lead"])] * 3
+    assert cache.stats()["coalesced"] == 3
+
+def test_owner_error_reaches_every_waiter_and_is_not_cached():
+    cache = ResultCache(ttl=60, max_weight=100)
+    status, future = cache.lookup("q")
+    assert status == "own"
+    threads, outcomes = run_waiters(cache, "q", 3)
+    error = ValueError("scrape failed")
+    for _ in range(50):  # let every waiter register on the Future first
+        if cache.stats()["coalesced"] == 3:
+            break
+        time.sleep(0.01)
+    cache.resolve("q", future, error=error)
+    for thread in threads:
+        thread.join(5)
+    assert outcomes == [("wait", error)] * 3
+    assert cache.lookup("q")[0] == "own"
+    # get_or_compute waiters fall back to computing themselves
+    status, future = cache.lookup("r")
+    cache.resolve("r", future, error=error)
+    assert cache.get_or_compute("r", lambda: ["own"]) == ["own"]
+
+def test_abandoned_stream_search_releases_its_waiters(monkeypatch):
+    cache = ResultCache(ttl=60, max_weight=100)
+    monkeypatch.setattr(pipeline, "search_cache", cache)
+
+    def fake_stream(keyword, location, category, preferred_range, max_scraped, top_k):
+        yield "kaggle", ["k"]
+        yield "yelp", ["k", "y"]
+
+    monkeypatch.setattr(pipeline, "_stream_search", fake_stream)
+    key = pipeline.query_key("bakery", "austin", "", None) + (pipeline.SCRAPE_MAX_RESULTS, 20)
+    stream = pipeline.stream_search("bakery", "austin", top_k=20)
+    assert next(stream) == ("kaggle", ["k"])
+    status, future = cache.lookup(key)
+    assert status == "wait"
+    stream.close()  # e.g. the Streamlit script was stopped mid-run
+    with pytest.raises(RuntimeError, match="abandoned"):
+        future.result(timeout=1)
+    # Nothing was cached: the next run computes in full and caches its final ranking
+    assert list(pipeline.stream_search("bakery", "austin", top_k=20)) == [("kaggle", ["k"]), ("yelp", ["k", "y"])]
+    assert list(pipeline.stream_search("bakery", "austin", top_k=20)) == [("cache", ["k", "y"])]
@@ -0,0 +1,34 @@
+import pytest
+
+from src import data_loader, search_index
+
+QUERIES = [
+    ("bakery", "texas", ""), ("oak", "austin", ""), ("ai", "us", ""), ("summit eagle", "denver", ""),
+    ("golden", "toronto", "bakery"), ("zzz", "texas", ""), ("liberty", "new south wales", "")
+]
+
+def matches(kw, loc, cat, size_range=None):
+    return data_loader.filter_companies(kw, loc, cat, size_range=size_range).index.tolist()
+
+@pytest.mark.parametrize("columnar", [True, False])
+@pytest.mark.parametrize("scan_fraction", [search_index.SCAN_FRACTION, 1.0])
+def test_index_matches_scan(dataset_dir, monkeypatch, columnar, scan_fraction):
+    if columnar:
+        data_loader.convert_to_columnar()
+    expected = {(kw, loc, cat): matches(kw, loc, cat) for kw, loc, cat in QUERIES}
+    expected_sized = matches("bakery", "texas", "", (1, 50))
+    search_index.build_index()
+    monkeypatch.setattr(search_index, "SCAN_FRACTION", scan_fraction)
+    assert search_index.load_index(expected_rows=data_loader.dataset_rows()) is not None
+    for (kw, loc, cat), rows in expected.items():
+        assert matches(kw, loc, cat) == rows
+    assert matches("bakery", "texas", "", (1, 50)) == expected_sized
+
+def test_short_or_common_needles_fall_back_to_scan(dataset_dir):
+    data_loader.convert_to_columnar()
+    search_index.build_index()
+    index = search_index.load_index()
+    rows = data_loader.dataset_rows()
+    assert search_index.candidate_rows(index, "ai", "us", "", rows) is None
+    assert search_index.candidate_rows(index, "bakery", "texas", "", rows) is None
+    assert search_index.candidate_rows(index, "summit eagle", "denver", "", rows) is not None
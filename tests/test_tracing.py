@@ -0,0 +1,30 @@
+import contextvars
+
+from src import tracing
+from src.tracing import clear_trace, span, start_trace
+
+def test_spans_follow_the_trace_context(monkeypatch):
+    monkeypatch.setattr(tracing, "ENABLED", False)
+
+    def session_run():
+        trace = start_trace()
+        with span("filter", rows=3):
+            pass
+        return trace
+
+    trace = contextvars.copy_context().run(session_run)
+    assert [s.name for s in trace.spans] == ["filter"]
+    # Another session without a trace keeps the no-op span
+    assert contextvars.copy_context().run(lambda: span("filter")) is tracing._NOOP
+
+def test_clear_trace_stops_collecting(monkeypatch):
+    monkeypatch.setattr(tracing, "ENABLED", False)
+
+    def session_run():
+        trace = start_trace()
+        clear_trace()
+        with span("filter"):
+            pass
+        return trace
+
+    assert contextvars.copy_context().run(session_run).spans == []
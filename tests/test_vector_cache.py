@@ -0,0 +1,33 @@
+import numpy as np
+
+from src.vector_cache import VectorCache
+
+def vectors_of(texts):
+    return np.array([[float(len(t)), float(ord(t[0]))] for t in texts], dtype=np.float32)
+
+def test_two_instances_share_slots(tmp_path):
+    a = VectorCache("shared", "m", dim=2, capacity=4, cache_dir=str(tmp_path))
+    b = VectorCache("shared", "m", dim=2, capacity=4, cache_dir=str(tmp_path))
+    a.get_or_compute(["x"], vectors_of)
+    b.get_or_compute(["yy"], vectors_of)
+    # A must not see B's vector under its own key, and B must hit A's entry
+    assert a.get_or_compute(["x"], lambda texts: 1 / 0).tolist() == vectors_of(["x"]).tolist()
+    assert b.get_or_compute(["x", "yy"], lambda texts: 1 / 0).tolist() == vectors_of(["x", "yy"]).tolist()
+
+def test_entries_survive_restart(tmp_path):
+    VectorCache("c", "m", dim=2, capacity=4, cache_dir=str(tmp_path)).get_or_compute(["abc"], vectors_of)
+    reopened = VectorCache("c", "m", dim=2, capacity=4, cache_dir=str(tmp_path))
+    assert reopened.get_or_compute(["abc"], lambda texts: 1 / 0).tolist() == vectors_of(["abc"]).tolist()
+
+def test_eviction_keeps_recent_entries(tmp_path):
+    a = VectorCache("lru", "m", dim=2, capacity=2, cache_dir=str(tmp_path))
+    b = VectorCache("lru", "m", dim=2, capacity=2, cache_dir=str(tmp_path))
+    a.get_or_compute(["a"], vectors_of)
+    a.get_or_compute(["bb"], vectors_of)
+    a.get_or_compute(["a"], vectors_of)  # "bb" is now least recently used
+    b.get_or_compute(["ccc"], vectors_of)
+    computed = []
+    result = a.get_or_compute(["a", "bb", "ccc"], lambda texts: computed.extend(texts) or vectors_of(texts))
+    assert computed == ["bb"]
+    assert result.tolist() == vectors_of(["a", "bb", "ccc"]).tolist()
+    assert a.stats()["entries"] == 2
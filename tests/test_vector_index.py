@@ -0,0 +1,67 @@
+import zlib
+
+import numpy as np
+import pytest
+
+from src import data_loader, vector_index
+
+pytest.importorskip("faiss")
+
+COLUMNS = ["name", "industry", "city", "state", "country_name"]
+
+def fake_embed(texts):
+    vecs = np.stack([np.random.default_rng(zlib.crc32(t.encode())).standard_normal(32) for t in texts])
+    return (vecs / np.linalg.norm(vecs, axis=1, keepdims=True)).astype(np.float32)
+
+@pytest.fixture
+def vector_dataset(dataset_dir, monkeypatch):
+    monkeypatch.setattr(vector_index, "_embed", fake_embed)
+    monkeypatch.setattr(vector_index, "_cached_index", None)
+    data_loader.convert_to_columnar()
+    return dataset_dir
+
+def row_text(row):
+    return vector_index.company_text(*data_loader.company_rows([row])[COLUMNS].astype(str).values[0])
+
+def test_nlist_is_capped_by_training_sample(vector_dataset):
+    import faiss
+
+    vector_index.build_vector_index()
+    index = faiss.read_index(vector_index.VECTOR_INDEX_PATH)
+    assert index.ntotal == 3000
+    assert index.nlist == 3000 // vector_index.MIN_TRAIN_PER_LIST  # 4·√3000 would be 219
+
+@pytest.mark.parametrize("options", [{}, {"hnsw": True}])
+def test_search_finds_each_company(vector_dataset, options):
+    vector_index.build_vector_index(**options)
+    assert vector_index.load_vector_index() is not None
+    for row in (0, 1234, 2999):
+        rows, sims = vector_index.search_similar(row_text(row), k=5)
+        assert rows[0] == row
+        assert sims[0] == pytest.approx(1.0, abs=1e-5)
+
+def test_pq_index_returns_dataset_rows(vector_dataset):
+    vector_index.build_vector_index(nlist=4, pq_m=8)
+    rows, sims = vector_index.search_similar(row_text(7), k=5)
+    assert len(rows) == 5 and ((rows >= 0) & (rows < 3000)).all()
+    assert (np.diff(sims) <= 0).all()
+
+def test_index_for_another_dataset_is_ignored(vector_dataset, monkeypatch):
+    vector_index.build_vector_index()
+    monkeypatch.setattr(vector_index, "_cached_index", None)
+    monkeypatch.setattr(vector_index, "dataset_rows", lambda: 10)
+    assert vector_index.load_vector_index() is None
+    assert vector_index.search_similar("bakery") is None
+
+def test_semantic_companies_applies_filters(vector_dataset):
+    vector_index.build_vector_index()
+    company = data_loader.company_rows([42]).iloc[0]
+    loc = company["city"].lower()
+    found = vector_index.semantic_companies(row_text(42), loc, k=20)
+    assert 42 in found.index
+    located = np.zeros(len(found), dtype=bool)
+    for col in ("city", "state", "country_name"):
+        located |= found[col].astype(str).str.lower().str.contains(loc, regex=False).to_numpy()
+    assert located.all()
+    elsewhere = vector_index.semantic_companies(row_text(42), "zzz-nowhere", k=20)
+    assert elsewhere.empty